@@ -2,7 +2,21 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+from plotly.colors import sample_colorscale, sequential
 import warnings
+import os
+import glob
+import json
+import hashlib
+import re
+import shutil
+import sys
+import time
+import threading
+import tracemalloc
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from sample_data import generate_segments
 
 warnings.filterwarnings('ignore')
 
@@ -13,26 +27,290 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data
+PERF_HISTORY = 20
+PERF_LOG = os.environ.get('RFM_PERF_LOG')
+PERF_ENABLED = os.environ.get('RFM_PERF') == '1' or 'perf' in st.query_params
+
+def start_run(scope='app'):
+    run = {'scope': scope, 'started': time.time(), 'clock': time.perf_counter(), 'stages': {}, 'charts': {}, 'peak_mb': None, 'traced': False}
+    if PERF_ENABLED:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            run['traced'] = True
+        tracemalloc.reset_peak()
+    return run
+
+perf_run = start_run()
+
+@contextmanager
+def perf_stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        perf_run['stages'][name] = perf_run['stages'].get(name, 0) + time.perf_counter() - started
+
+def plotly_chart(fig, name, **kwargs):
+    with perf_stage('plotly'):
+        st.plotly_chart(fig, **kwargs)
+    if PERF_ENABLED:
+        perf_run['charts'][name] = len(fig.to_json())
+
+DATA_FILES = [os.environ['RFM_DATA_PATH']] if os.environ.get('RFM_DATA_PATH') else ['final_customer_segments (1).csv', 'final_customer_segments.csv']
+SAMPLE_ROWS = int(os.environ.get('RFM_SAMPLE_ROWS', '0'))
+
+SNAPSHOT_DIR = '.rfm_snapshot'
+DATASET_VERSIONS = 2
+
+CSV_DTYPES = {
+    'R_Score': 'int8',
+    'F_Score': 'int8',
+    'M_Score': 'int8',
+    'Cluster_KMeans': 'int16',
+    'Cluster_DBSCAN': 'int16',
+    'Cluster_Agglomerative': 'int16',
+    'Customer_Category': 'category',
+    'RFM_Segment': 'category'
+}
+
+def file_fingerprint(path):
+    info = os.stat(path)
+    h = hashlib.blake2b(f"{info.st_size}:{info.st_mtime_ns}".encode(), digest_size=8)
+    with open(path, 'rb') as fh:
+        h.update(fh.read(1 << 16))
+    return h.hexdigest()
+
+def snapshot_path(path, fingerprint):
+    stem = os.path.splitext(os.path.basename(path))[0].replace(' ', '_')
+    return os.path.join(os.path.dirname(path) or '.', SNAPSHOT_DIR, f"{stem}-{fingerprint}")
+
+def read_segments_csv(path):
+    header = pd.read_csv(path, index_col=0, nrows=0).columns
+    dtypes = {c: t for c, t in CSV_DTYPES.items() if c in header}
+    return pd.read_csv(path, index_col=0, dtype=dtypes)
+
+def write_snapshot(df, path):
+    tmp = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    index = df.index.to_numpy()
+    if index.dtype == object:
+        index = index.astype(str)
+    np.save(os.path.join(tmp, 'index.npy'), index)
+    meta = {'index': df.index.name, 'columns': []}
+    for i, col in enumerate(df.columns):
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            cats = s.cat.categories.to_numpy()
+            np.save(os.path.join(tmp, f'{i}.codes.npy'), s.cat.codes.to_numpy())
+            np.save(os.path.join(tmp, f'{i}.cats.npy'), cats.astype(str) if cats.dtype == object else cats)
+            meta['columns'].append({'name': col, 'kind': 'category'})
+        else:
+            values = s.to_numpy()
+            np.save(os.path.join(tmp, f'{i}.npy'), values.astype(str) if values.dtype == object else values)
+            meta['columns'].append({'name': col, 'kind': 'plain'})
+    with open(os.path.join(tmp, 'meta.json'), 'w') as fh:
+        json.dump(meta, fh)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def prune_snapshots(keep, suffix=''):
+    prefix = keep[:len(keep) - len(suffix)].rsplit('-', 1)[0]
+    for old in glob.glob(glob.escape(prefix) + '-*' + glob.escape(suffix)):
+        fingerprint = old[len(prefix) + 1:len(old) - len(suffix)]
+        if old == keep or not re.fullmatch('[0-9a-f]{16}', fingerprint):
+            continue
+        if os.path.isdir(old):
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.remove(old)
+
+def read_snapshot(path):
+    with open(os.path.join(path, 'meta.json')) as fh:
+        meta = json.load(fh)
+    index = pd.Index(np.load(os.path.join(path, 'index.npy'), mmap_mode='r'), name=meta['index'])
+    data = {}
+    for i, col in enumerate(meta['columns']):
+        if col['kind'] == 'category':
+            codes = np.load(os.path.join(path, f'{i}.codes.npy'), mmap_mode='r')
+            cats = np.load(os.path.join(path, f'{i}.cats.npy'))
+            data[col['name']] = pd.Categorical.from_codes(codes, categories=cats)
+        else:
+            data[col['name']] = np.load(os.path.join(path, f'{i}.npy'), mmap_mode='r')
+    return pd.DataFrame(data, index=index, copy=False)
+
+HIST_BINS = 30
+
+def histogram_bins(values, bins=HIST_BINS):
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    return np.histogram(values, bins=bins)
+
+AGG_COLS = ['Recency', 'Frequency', 'Monetary', 'AvgOrderValue', 'RFM_Score']
+
+def cluster_aggregates(df, by='Cluster_Label', dropna=True):
+    cols = [c for c in AGG_COLS if c in df.columns]
+    values = df[cols].astype(float)
+    squares = values.pow(2).add_suffix('_sumsq')
+    spec = {'Cluster_KMeans': 'first'}
+    spec.update({c: ['count', 'sum', 'min', 'max'] for c in cols})
+    spec.update({c: 'sum' for c in squares.columns})
+    
+    keys = by if isinstance(by, list) else df[by]
+    grouped = pd.concat([df[['Cluster_KMeans']], values, squares], axis=1).groupby(keys, dropna=dropna, observed=True)
+    agg = grouped.agg(spec)
+    agg.columns = [c if c.endswith('_sumsq') else f'{c}_{stat}' for c, stat in agg.columns]
+    agg = agg.rename(columns={'Cluster_KMeans_first': 'cluster_id'})
+    agg.insert(0, 'count', grouped.size())
+    if isinstance(agg.index, pd.CategoricalIndex):
+        agg.index = agg.index.astype(object)
+    return agg
+
+def agg_mean(agg, col):
+    return agg[f'{col}_sum'] / agg[f'{col}_count']
+
+def agg_total_mean(agg, col):
+    count = agg[f'{col}_count'].sum()
+    return agg[f'{col}_sum'].sum() / count if count > 0 else np.nan
+
+def agg_summary(agg):
+    stats = {}
+    for col in AGG_COLS:
+        if f'{col}_sumsq' not in agg.columns:
+            continue
+        count, total, sumsq = agg[f'{col}_count'].sum(), agg[f'{col}_sum'].sum(), agg[f'{col}_sumsq'].sum()
+        mean = total / count if count > 0 else np.nan
+        var = max(sumsq - total * mean, 0) / (count - 1) if count > 1 else np.nan
+        stats[col] = {'count': count, 'mean': mean, 'std': np.sqrt(var), 'min': agg[f'{col}_min'].min(), 'max': agg[f'{col}_max'].max()}
+    return pd.DataFrame(stats)
+
+STREAM_THRESHOLD_BYTES = int(os.environ.get('RFM_STREAM_THRESHOLD_MB', '2048')) << 20
+STREAM_CHUNK_ROWS = 500000
+RESERVOIR_ROWS = 200000
+HIST_COLS = ['Recency', 'Frequency', 'Monetary']
+
+def aggregate_rules(columns):
+    rules = {}
+    for c in columns:
+        if c == 'cluster_id':
+            rules[c] = 'first'
+        elif c.endswith('_min'):
+            rules[c] = 'min'
+        elif c.endswith('_max'):
+            rules[c] = 'max'
+        else:
+            rules[c] = 'sum'
+    return rules
+
+def merge_aggregates(a, b):
+    if a is None:
+        return b
+    return pd.concat([a, b]).groupby(level=0).agg(aggregate_rules(b.columns))
+
+def stream_segments(path):
+    header = pd.read_csv(path, index_col=0, nrows=0).columns
+    dtypes = {c: t for c, t in CSV_DTYPES.items() if c in header}
+    rng = np.random.default_rng(42)
+    rows, agg, sample, keys = 0, None, None, None
+    
+    for chunk in pd.read_csv(path, index_col=0, dtype=dtypes, chunksize=STREAM_CHUNK_ROWS):
+        rows += len(chunk)
+        agg = merge_aggregates(agg, cluster_aggregates(chunk, by='Cluster_KMeans'))
+        chunk_keys = rng.random(len(chunk))
+        if sample is not None:
+            chunk = pd.concat([sample, chunk])
+            chunk_keys = np.concatenate([keys, chunk_keys])
+        if len(chunk) > RESERVOIR_ROWS:
+            keep = np.sort(np.argpartition(chunk_keys, RESERVOIR_ROWS)[:RESERVOIR_ROWS])
+            chunk, chunk_keys = chunk.iloc[keep], chunk_keys[keep]
+        sample, keys = chunk, chunk_keys
+    
+    for col, dtype in dtypes.items():
+        sample[col] = sample[col].astype(dtype)
+    
+    edges = {}
+    for col in HIST_COLS:
+        if f'{col}_min' in agg.columns:
+            lo, hi = agg[f'{col}_min'].min(), agg[f'{col}_max'].max()
+            if not (pd.isna(lo) or pd.isna(hi)):
+                edges[col] = np.histogram_bin_edges([lo, hi], bins=HIST_BINS)
+    hists = {col: np.zeros(HIST_BINS, dtype=np.int64) for col in edges}
+    for chunk in pd.read_csv(path, usecols=list(edges), chunksize=STREAM_CHUNK_ROWS):
+        for col in edges:
+            hists[col] += histogram_bins(chunk[col], edges[col])[0]
+    
+    return sample, {
+        'rows': rows,
+        'agg': agg.sort_index(),
+        'hists': {col: (hists[col], edges[col]) for col in edges}
+    }
+
+def load_stream(path, version):
+    cache = snapshot_path(path, version) + '.stream.pkl'
+    if os.path.isfile(cache):
+        try:
+            sample, stream = pd.read_pickle(cache)
+            return sample, version, stream
+        except Exception:
+            try:
+                os.remove(cache)
+            except OSError:
+                pass
+    
+    sample, stream = stream_segments(path)
+    tmp = f"{cache}.tmp{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        pd.to_pickle((sample, stream), tmp)
+        os.replace(tmp, cache)
+        prune_snapshots(cache, '.stream.pkl')
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return sample, version, stream
+
+def load_segments(path):
+    version = file_fingerprint(path)
+    if os.path.getsize(path) > STREAM_THRESHOLD_BYTES:
+        return load_stream(path, version)
+    
+    snap = snapshot_path(path, version)
+    if os.path.isdir(snap):
+        try:
+            return read_snapshot(snap), version, None
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(snap, ignore_errors=True)
+    
+    rfm = read_segments_csv(path)
+    try:
+        write_snapshot(rfm, snap)
+        prune_snapshots(snap)
+    except OSError:
+        pass
+    return rfm, version, None
+
+def sample_segments(n_samples=1000, seed=42):
+    rfm = generate_segments(n_samples, seed).astype(CSV_DTYPES)
+    return rfm, f'sample-{n_samples}-{seed}'
+
+@st.cache_resource
 def load_data():
+    if SAMPLE_ROWS > 0:
+        rfm, version = sample_segments(SAMPLE_ROWS)
+        return rfm, version, None
+    
     try:
-        rfm = pd.read_csv('final_customer_segments (1).csv', index_col=0)
+        rfm, version, stream = load_segments(DATA_FILES[0])
     except:
         try:
-            rfm = pd.read_csv('final_customer_segments.csv', index_col=0)
+            rfm, version, stream = load_segments(DATA_FILES[1])
         except:
             st.error("Data file not found. Using sample data for demonstration.")
-            np.random.seed(42)
-            n_samples = 1000
-            rfm = pd.DataFrame({
-                'Recency': np.random.randint(1, 365, n_samples),
-                'Frequency': np.random.randint(1, 50, n_samples),
-                'Monetary': np.random.uniform(100, 50000, n_samples),
-                'AvgOrderValue': np.random.uniform(50, 500, n_samples),
-                'RFM_Score': np.random.randint(100, 600, n_samples),
-                'Cluster_KMeans': np.random.choice([0, 1, 2, 3, 4, 5], n_samples, p=[0.2, 0.1, 0.15, 0.1, 0.25, 0.2])
-            })
-            rfm.index = [f'CUST_{i:04d}' for i in range(n_samples)]
+            rfm, version = sample_segments()
+            stream = None
     
     required_cols = ['Recency', 'Frequency', 'Monetary', 'AvgOrderValue', 'RFM_Score', 'Cluster_KMeans']
     for col in required_cols:
@@ -42,9 +320,7 @@ def load_data():
             else:
                 rfm[col] = 0
     
-    return rfm
-
-rfm = load_data()
+    return rfm, version, stream
 
 strats = {
     'champions': {'name':'🏆 Champions','grad':'linear-gradient(135deg,#FFD700,#FFA500, #FF8C00)','color':'#FFD700','priority':'CRITICAL','strategy':'VIP Platinum','tactics':['💎 Exclusive Early Access','🎁 Premium Gifts','📞 24/7 Manager','🌟 VIP Events','✨ Celebrations'],'kpis':['Retention>95%','Upsell>40%','Referral>30%'],'budget':'30%','roi':'500%'},
@@ -109,50 +385,445 @@ def format_content(text):
     else:
         return f'<div class="detail-item">{text}</div>'
 
-def get_strat(cid, data):
-    cd = data[data['Cluster_KMeans'] == cid]
-    if len(cd) == 0:
-        return {**strats['standard'], 'cluster_id': cid}
-    
-    r = cd['Recency'].mean() if 'Recency' in cd.columns else 100
-    f = cd['Frequency'].mean() if 'Frequency' in cd.columns else 5
-    m = cd['Monetary'].mean() if 'Monetary' in cd.columns else 500
-    
-    if pd.isna(r) or pd.isna(f) or pd.isna(m):
-        s = 'standard'
-    elif r < 50 and f > 10 and m > 1000: 
-        s = 'champions'
-    elif r < 50 and f > 5: 
-        s = 'loyal'
-    elif m > 1500: 
-        s = 'big'
-    elif r > 100: 
-        s = 'dormant'
-    elif r < 50 and f < 5: 
-        s = 'potential'
-    else: 
-        s = 'standard'
-    return {**strats[s], 'cluster_id': cid}
-
-@st.cache_data
-def init_data(rfm):
-    profs = {}
-    for c in rfm['Cluster_KMeans'].unique():
-        p = get_strat(c, rfm)
-        profs[c] = p
-        rfm.loc[rfm['Cluster_KMeans'] == c, 'Cluster_Label'] = f"{p['name']} (C{c})"
-        rfm.loc[rfm['Cluster_KMeans'] == c, 'Priority'] = p['priority']
-    
-    colors = {}
-    for c, p in profs.items():
-        label = f"{p['name']} (C{c})"
-        colors[label] = p['color']
+STRAT_RULES = ['standard', 'champions', 'loyal', 'big', 'dormant', 'potential']
+
+def strat_keys(r, f, m):
+    r, f, m = np.asarray(r, dtype=float), np.asarray(f, dtype=float), np.asarray(m, dtype=float)
+    return np.select([
+        np.isnan(r) | np.isnan(f) | np.isnan(m),
+        (r < 50) & (f > 10) & (m > 1000),
+        (r < 50) & (f > 5),
+        m > 1500,
+        r > 100,
+        (r < 50) & (f < 5)
+    ], STRAT_RULES, 'standard')
+
+def cluster_means(data, agg=None):
+    if agg is not None:
+        means = pd.DataFrame({c: agg_mean(agg, c) for c in ['Recency', 'Frequency', 'Monetary'] if f'{c}_sum' in agg.columns}, index=agg.index)
+    else:
+        cols = [c for c in ['Recency', 'Frequency', 'Monetary'] if c in data.columns]
+        means = data.groupby('Cluster_KMeans', sort=False)[cols].mean()
+    for col, default in [('Recency', 100), ('Frequency', 5), ('Monetary', 500)]:
+        if col not in means.columns:
+            means[col] = default
+    return means
+
+def label_columns(cluster_ids, profs):
+    ids = np.array(sorted(profs))
+    cluster_ids = np.asarray(cluster_ids)
+    pos = np.minimum(np.searchsorted(ids, cluster_ids), len(ids) - 1)
+    known = ids[pos] == cluster_ids
+    
+    labels = np.array([f"{profs[c]['name']} (C{c})" for c in ids])
+    priorities = np.array([profs[c]['priority'] for c in ids])
+    label_names, label_codes = np.unique(labels, return_inverse=True)
+    priority_names, priority_codes = np.unique(priorities, return_inverse=True)
+    return (
+        pd.Categorical.from_codes(np.where(known, label_codes[pos], -1), label_names),
+        pd.Categorical.from_codes(np.where(known, priority_codes[pos], -1), priority_names)
+    )
+
+@st.cache_resource(max_entries=DATASET_VERSIONS)
+def init_data(_rfm, version, _stream=None):
+    rfm = _rfm.copy(deep=False)
+    means = cluster_means(rfm, _stream['agg'] if _stream is not None else None)
+    keys = strat_keys(means['Recency'], means['Frequency'], means['Monetary'])
+    profs = {c: {**strats[s], 'cluster_id': c} for c, s in zip(means.index, keys)}
+    
+    rfm['Cluster_Label'], rfm['Priority'] = label_columns(rfm['Cluster_KMeans'], profs)
+    
+    colors = {f"{p['name']} (C{c})": p['color'] for c, p in profs.items()}
     
     return profs, colors, rfm
 
-profs, colors, rfm = init_data(rfm)
+RANGE_FILTER_COLS = ['RFM_Score', 'Monetary', 'Frequency', 'Recency']
+SKETCH_KNOTS = 100
+SKETCH_TAIL = [0.995, 0.999, 0.9999]
+
+def read_only(values):
+    values = values.view()
+    values.setflags(write=False)
+    return values
+
+def quantile_sketch(sv):
+    if sv.dtype.kind == 'f':
+        sv = sv[:np.searchsorted(sv, np.nan)]
+    if len(sv) == 0:
+        return {'probs': np.zeros(1), 'knots': np.zeros(1)}
+    probs = np.unique(np.concatenate([np.linspace(0, 1, SKETCH_KNOTS + 1), SKETCH_TAIL]))
+    knots = sv[np.round(probs * (len(sv) - 1)).astype(np.intp)]
+    return {'probs': read_only(probs), 'knots': read_only(knots)}
+
+def sketch_share(sketch, lo, hi):
+    probs, knots = sketch['probs'], sketch['knots']
+    return float(np.interp(hi, knots, probs) - np.interp(lo, knots, probs))
+
+def slider_steps(sketch, decimals=0):
+    knots = sketch['knots']
+    lo, hi = np.round(knots[[0, -1]], decimals)
+    inner = np.unique(np.round(knots[1:-1], decimals))
+    return (float(knots[0]), *inner[(inner > lo) & (inner < hi)].tolist(), float(knots[-1]))
+
+@st.cache_resource(max_entries=DATASET_VERSIONS)
+def build_filter_index(_rfm, version):
+    rfm = _rfm
+    fidx = {'n': len(rfm), 'values': {}, 'order': {}, 'sorted': {}, 'clusters': {}, 'priorities': {}}
+    
+    for col in RANGE_FILTER_COLS:
+        if col in rfm.columns:
+            values = rfm[col].to_numpy()
+            order = np.argsort(values, kind='stable')
+            fidx['values'][col] = read_only(values)
+            fidx['order'][col] = read_only(order)
+            fidx['sorted'][col] = read_only(values[order])
+    
+    started = time.perf_counter()
+    fidx['sketch'] = {col: quantile_sketch(sv) for col, sv in fidx['sorted'].items()}
+    fidx['sketch_ms'] = (time.perf_counter() - started) * 1000
+    
+    cluster_ids = rfm['Cluster_KMeans'].to_numpy()
+    codes, uniques = pd.factorize(cluster_ids)
+    rows_by_code = np.split(np.argsort(codes, kind='stable'), np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1])
+    fidx['cluster_ids'] = read_only(cluster_ids)
+    fidx['clusters'] = dict(zip(uniques.tolist(), map(read_only, rows_by_code)))
+    
+    if 'Priority' in rfm.columns:
+        priority = rfm['Priority'].astype('category')
+        codes = priority.cat.codes.to_numpy()
+        for code, p in enumerate(priority.cat.categories):
+            bitmap = codes == code
+            if bitmap.any():
+                fidx['priorities'][p] = {'bitmap': read_only(bitmap), 'rows': read_only(np.flatnonzero(bitmap))}
+    
+    if 'Monetary' in fidx['sorted']:
+        sv = fidx['sorted']['Monetary'].astype(float)
+        fidx['prefix'] = {'Monetary': read_only(np.cumsum(sv[~np.isnan(sv)]))}
+    
+    return fidx
+
+def matching_rows(fidx, ranges, segment='all', priority='all'):
+    empty = np.empty(0, dtype=np.intp)
+    selections = []
+    
+    for col, (lo, hi) in ranges.items():
+        if col not in fidx['sorted']:
+            continue
+        sv = fidx['sorted'][col]
+        a = np.searchsorted(sv, lo, side='left')
+        b = np.searchsorted(sv, hi, side='right')
+        if a == 0 and b == len(sv):
+            continue
+        values = fidx['values'][col]
+        selections.append((fidx['order'][col][a:b], lambda rows, v=values, lo=lo, hi=hi: (v[rows] >= lo) & (v[rows] <= hi)))
+    
+    if segment != 'all':
+        ids = fidx['cluster_ids']
+        selections.append((fidx['clusters'].get(segment, empty), lambda rows, seg=segment: ids[rows] == seg))
+    
+    if priority != 'all' and fidx['priorities']:
+        entry = fidx['priorities'].get(priority)
+        if entry is None:
+            return empty
+        selections.append((entry['rows'], lambda rows, bitmap=entry['bitmap']: bitmap[rows]))
+    
+    if not selections:
+        return None
+    
+    selections.sort(key=lambda sel: len(sel[0]))
+    rows = selections[0][0]
+    for _, check in selections[1:]:
+        if len(rows) == 0:
+            break
+        rows = rows[check(rows)]
+    return rows
+
+def select_rows(fidx, ranges, segment='all', priority='all'):
+    rows = matching_rows(fidx, ranges, segment, priority)
+    return None if rows is None else np.sort(rows)
+
+def count_rows(fidx, ranges, segment='all', priority='all'):
+    rows = matching_rows(fidx, ranges, segment, priority)
+    return fidx['n'] if rows is None else len(rows)
+
+LORENZ_POINTS = 200
+
+def concentration_stats(fidx, rows, share=0.2, col='Monetary'):
+    if rows is None:
+        cs = fidx['prefix'][col]
+    else:
+        mask = np.zeros(fidx['n'], dtype=bool)
+        mask[rows] = True
+        sv = fidx['sorted'][col][mask[fidx['order'][col]]].astype(float)
+        cs = np.cumsum(sv[~np.isnan(sv)])
+    
+    n = len(cs)
+    if n == 0 or cs[-1] <= 0:
+        return {'top_share': 0, 'gini': 0, 'lorenz_x': np.array([0.0, 1.0]), 'lorenz_y': np.array([0.0, 1.0])}
+    
+    k = max(1, int(n * share))
+    top = cs[-1] - (cs[n - k - 1] if k < n else 0)
+    idx = np.unique(np.linspace(0, n - 1, LORENZ_POINTS + 1).astype(np.intp))
+    return {
+        'top_share': top / cs[-1] * 100,
+        'gini': (n + 1 - 2 * cs.sum() / cs[-1]) / n,
+        'lorenz_x': np.concatenate([[0.0], (idx + 1) / n]),
+        'lorenz_y': np.concatenate([[0.0], cs[idx] / cs[-1]])
+    }
+
+def champion_ids(profs):
+    return {c for c, p in profs.items() if p['name'] == strats['champions']['name']}
+
+CUBE_BINS = 8
+
+def build_cube(rfm, fidx):
+    keys = [rfm[c] for c in ['Cluster_KMeans', 'R_Score', 'F_Score', 'M_Score', 'RFM_Score'] if c in rfm.columns]
+    for col in HIST_COLS:
+        if col not in fidx['sorted']:
+            continue
+        sv = fidx['sorted'][col].astype(float)
+        valid = sv[~np.isnan(sv)]
+        if len(valid) == 0:
+            continue
+        if col == 'Monetary':
+            # one cell edge at each slider stop and just above it, so inclusive lo/hi bounds both land on edges
+            stops = np.array(slider_steps(fidx['sketch'][col]))
+            edges = np.unique(np.concatenate([stops, np.nextafter(stops, np.inf)]))
+        else:
+            edges = np.unique(valid[np.linspace(0, len(valid) - 1, CUBE_BINS + 1).astype(np.intp)])
+        bins = np.clip(np.searchsorted(edges, rfm[col].to_numpy(), side='right') - 1, 0, max(len(edges) - 2, 0))
+        keys.append(pd.Series(bins.astype(np.int16), index=rfm.index, name=f'{col}_bin'))
+    return cluster_aggregates(rfm, by=keys, dropna=False).reset_index(drop=True)
+
+def cube_path(source, version):
+    return snapshot_path(source, version) + '.cube' if source else None
 
-st.markdown("""
+def save_cube(cube, path):
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_snapshot(cube, path)
+        prune_snapshots(path, '.cube')
+    except OSError:
+        pass
+
+@st.cache_resource(max_entries=DATASET_VERSIONS)
+def load_cube(_rfm, _fidx, _profs, _source, version):
+    path = cube_path(_source, version)
+    cube = None
+    if path and os.path.isdir(path):
+        try:
+            cube = read_snapshot(path)
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(path, ignore_errors=True)
+    
+    if cube is None:
+        cube = build_cube(_rfm, _fidx)
+        save_cube(cube, path)
+    
+    return label_cube(cube, _profs)
+
+def label_cube(cube, profs):
+    cube = cube.copy(deep=False)
+    cube['Cluster_Label'], cube['Priority'] = label_columns(cube['cluster_id'], profs)
+    return cube
+
+def cube_aggregates(cube, segment, priority, ranges):
+    cells = cube
+    if segment != 'all':
+        cells = cells[cells['cluster_id'] == segment]
+    if priority != 'all':
+        cells = cells[cells['Priority'] == priority]
+    
+    for col, (lo, hi) in ranges.items():
+        if f'{col}_min' not in cells.columns:
+            continue
+        inside = (cells[f'{col}_min'] >= lo) & (cells[f'{col}_max'] <= hi) & (cells[f'{col}_count'] == cells['count'])
+        outside = (cells[f'{col}_max'] < lo) | (cells[f'{col}_min'] > hi)
+        if not (inside | outside).all():
+            return None
+        cells = cells[inside]
+    
+    measures = [c for c in cells.columns if c not in ('Cluster_Label', 'Priority')]
+    agg = cells.groupby('Cluster_Label', observed=True)[measures].agg(aggregate_rules(measures))
+    agg.index = agg.index.astype(object)
+    return agg
+
+def filtered_aggregates(cube, df, segment, priority, ranges):
+    agg = cube_aggregates(cube, segment, priority, ranges) if cube is not None else None
+    return agg if agg is not None else cluster_aggregates(df)
+
+@st.cache_resource(max_entries=DATASET_VERSIONS)
+def dataset_summary(_agg, _profs, version):
+    agg = _agg
+    rows = agg['count'].sum()
+    champion_count = agg.loc[agg['cluster_id'].isin(champion_ids(_profs)), 'count'].sum()
+    return {
+        'total_customers': rows,
+        'segment_count': agg['cluster_id'].nunique(),
+        'total_rev': agg['Monetary_sum'].sum() if 'Monetary_sum' in agg.columns else 0,
+        'avg_rev': agg_total_mean(agg, 'Monetary') if 'Monetary_sum' in agg.columns else 0,
+        'avg_order': agg_total_mean(agg, 'AvgOrderValue') if 'AvgOrderValue_sum' in agg.columns else 0,
+        'max_order': agg['AvgOrderValue_max'].max() if 'AvgOrderValue_max' in agg.columns else 0,
+        'champion_count': champion_count,
+        'champion_pct': (champion_count / rows * 100) if rows > 0 else 0
+    }
+
+@st.cache_resource(max_entries=DATASET_VERSIONS)
+def full_aggregates(_stream, _profs, version):
+    agg = _stream['agg'].copy()
+    agg.index = pd.Index([f"{_profs[c]['name']} (C{c})" for c in agg.index], name='Cluster_Label')
+    return agg.sort_index()
+
+@st.cache_resource(max_entries=DATASET_VERSIONS)
+def slider_domains(_fidx, version):
+    domains = {}
+    for col, sketch in _fidx['sketch'].items():
+        cast = float if col == 'Monetary' else int
+        domains[col] = (cast(sketch['knots'][0]), cast(sketch['knots'][-1]))
+    return domains
+
+def assemble_dataset(rfm, version, stream, profs, colors, cube=None, source=None):
+    fidx = build_filter_index(rfm, version)
+    if cube is None and stream is None:
+        cube = load_cube(rfm, fidx, profs, source, version)
+    return {
+        'version': version,
+        'rfm': rfm,
+        'stream': stream,
+        'profs': profs,
+        'colors': colors,
+        'fidx': fidx,
+        'cube': cube,
+        'summary': dataset_summary(stream['agg'] if stream is not None else cube, profs, version),
+        'domains': slider_domains(fidx, version)
+    }
+
+def prepare_dataset():
+    rfm, version, stream = load_data()
+    profs, colors, rfm = init_data(rfm, version, stream)
+    return assemble_dataset(rfm, version, stream, profs, colors, source=data_source())
+
+def data_source():
+    if SAMPLE_ROWS > 0:
+        return None
+    return next((path for path in DATA_FILES if os.path.isfile(path)), None)
+
+def changed_rows(old, new):
+    common = [c for c in new.columns if c in old.columns]
+    prev = old[common].reindex(new.index)
+    changed = ~new.index.isin(old.index)
+    for col in common:
+        a, b = prev[col], new[col]
+        if isinstance(a.dtype, pd.CategoricalDtype) or isinstance(b.dtype, pd.CategoricalDtype):
+            a, b = a.astype(object), b.astype(object)
+        changed |= ~((a == b) | (a.isna() & b.isna())).to_numpy()
+    return changed
+
+def patch_dataset(old, raw, version, source):
+    old_rfm = old['rfm']
+    changed = changed_rows(old_rfm, raw)
+    removed = ~old_rfm.index.isin(raw.index)
+    prev_ids = old_rfm['Cluster_KMeans'].reindex(raw.index)[changed].dropna()
+    affected = pd.unique(np.concatenate([
+        raw['Cluster_KMeans'].to_numpy()[changed],
+        prev_ids.to_numpy(),
+        old_rfm['Cluster_KMeans'].to_numpy()[removed]
+    ]).astype(raw['Cluster_KMeans'].dtype))
+    in_affected = raw['Cluster_KMeans'].isin(affected).to_numpy()
+    
+    means = cluster_means(raw[in_affected])
+    keys = strat_keys(means['Recency'], means['Frequency'], means['Monetary'])
+    stale = set(affected.tolist())
+    profs = {c: p for c, p in old['profs'].items() if c not in stale}
+    profs.update({c: {**strats[s], 'cluster_id': c} for c, s in zip(means.index, keys)})
+    
+    rfm = raw.copy(deep=False)
+    rfm['Cluster_Label'], rfm['Priority'] = label_columns(rfm['Cluster_KMeans'], profs)
+    colors = {f"{p['name']} (C{c})": p['color'] for c, p in profs.items()}
+    
+    cube = None
+    if old['cube'] is not None:
+        fidx = build_filter_index(rfm, version)
+        kept = old['cube'].drop(columns=['Cluster_Label', 'Priority'])
+        kept = kept[~kept['cluster_id'].isin(affected)]
+        cube = pd.concat([kept, build_cube(rfm[in_affected], fidx)], ignore_index=True)
+        save_cube(cube, cube_path(source, version))
+        cube = label_cube(cube, profs)
+    
+    dataset = assemble_dataset(rfm, version, None, profs, colors, cube, source)
+    dataset['refresh'] = {'changed': int(changed.sum()), 'removed': int(removed.sum()), 'clusters': len(affected)}
+    return dataset
+
+WATCH_INTERVAL = float(os.environ.get('RFM_WATCH_INTERVAL', '5'))
+
+@st.cache_resource
+def dataset_store():
+    return {'current': None, 'lock': threading.Lock(), 'reload_lock': threading.Lock()}
+
+def current_dataset():
+    store = dataset_store()
+    with store['lock']:
+        if store['current'] is None:
+            store['current'] = prepare_dataset()
+        return store['current']
+
+def refresh_dataset():
+    store = dataset_store()
+    path = data_source()
+    if path is None:
+        return None
+    
+    with store['reload_lock']:
+        old = current_dataset()
+        if file_fingerprint(path) == old['version']:
+            return None
+        
+        raw, version, stream = load_segments(path)
+        if stream is None and old['stream'] is None and raw.index.is_unique and old['rfm'].index.is_unique:
+            new = patch_dataset(old, raw, version, path)
+        else:
+            profs, colors, rfm = init_data(raw, version, stream)
+            new = assemble_dataset(rfm, version, stream, profs, colors, source=path)
+            new['refresh'] = {'changed': len(rfm), 'removed': 0, 'clusters': len(profs)}
+        
+        with store['lock']:
+            store['current'] = new
+        load_data.clear()
+    
+    purge_views(old['version'])
+    return new['refresh']
+
+def watch_data_file():
+    seen = None
+    while True:
+        time.sleep(WATCH_INTERVAL)
+        try:
+            path = data_source()
+            fingerprint = file_fingerprint(path) if path else None
+            if fingerprint is not None and fingerprint == seen and fingerprint != current_dataset()['version']:
+                refresh_dataset()
+            seen = fingerprint
+        except Exception:
+            seen = None
+
+@st.cache_resource
+def start_watcher():
+    if WATCH_INTERVAL <= 0:
+        return None
+    thread = threading.Thread(target=watch_data_file, name='rfm-watcher', daemon=True)
+    thread.start()
+    return thread
+
+with perf_stage('dataset'):
+    ds = current_dataset()
+start_watcher()
+rfm, data_version, stream = ds['rfm'], ds['version'], ds['stream']
+profs, colors, fidx, cube, summary, domains = ds['profs'], ds['colors'], ds['fidx'], ds['cube'], ds['summary'], ds['domains']
+
+with perf_stage('markdown'):
+    st.markdown("""
 <style>
     * {margin: 0; padding: 0; box-sizing: border-box}
     body {font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; background: #0f172a; min-height: 100vh}
@@ -299,8 +970,9 @@ st.markdown("""
     .filter-column {padding: 0.5rem}
     .filter-label {font-size: 0.875rem; color: #94a3b8; margin-bottom: 0.75rem; font-weight: 600; display: block}
     
-    .stTabs [data-baseweb="tab-list"] {gap: 0.75rem; margin: 2.5rem 0 2rem 0}
-    .stTabs [data-baseweb="tab"] {
+    div[data-testid="stRadio"] [role="radiogroup"] {gap: 0.75rem; margin: 2.5rem 0 2rem 0}
+    div[data-testid="stRadio"] [role="radiogroup"] label > div:first-child {display: none}
+    div[data-testid="stRadio"] [role="radiogroup"] label {
         background: rgba(30, 41, 59, 0.5) !important; 
         border: 1px solid rgba(255, 255, 255, 0.08) !important;
         border-radius: 16px !important; 
@@ -310,13 +982,13 @@ st.markdown("""
         transition: all 0.3s ease;
         font-size: 1rem !important;
     }
-    .stTabs [data-baseweb="tab"]:hover {
+    div[data-testid="stRadio"] [role="radiogroup"] label:hover {
         background: rgba(30, 41, 59, 0.8) !important; 
         color: #fff !important; 
         border-color: rgba(102, 126, 234, 0.3) !important;
         transform: translateY(-2px);
     }
-    .stTabs [aria-selected="true"] {
+    div[data-testid="stRadio"] [role="radiogroup"] label:has(input:checked) {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important; 
         color: #fff !important; 
         border-color: transparent !important;
@@ -686,8 +1358,124 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def create_charts(df):
-    cc = df['Cluster_Label'].value_counts()
+VIEW_CACHE_SIZE = 32
+
+@st.cache_resource
+def view_cache():
+    return {'entries': OrderedDict(), 'pending': {}, 'hits': 0, 'misses': 0, 'lock': threading.Lock()}
+
+def memoize_view(key, build):
+    cache = view_cache()
+    while True:
+        with cache['lock']:
+            if key in cache['entries']:
+                cache['entries'].move_to_end(key)
+                cache['hits'] += 1
+                return cache['entries'][key]
+            pending = cache['pending'].get(key)
+            if pending is None:
+                pending = cache['pending'][key] = threading.Event()
+                cache['misses'] += 1
+                break
+        pending.wait()
+    
+    try:
+        value = build()
+        with cache['lock']:
+            cache['entries'][key] = value
+            while len(cache['entries']) > VIEW_CACHE_SIZE:
+                cache['entries'].popitem(last=False)
+    finally:
+        with cache['lock']:
+            cache['pending'].pop(key, None)
+        pending.set()
+    return value
+
+def purge_views(version):
+    cache = view_cache()
+    with cache['lock']:
+        for key in [k for k in cache['entries'] if k[1][0] == version]:
+            del cache['entries'][key]
+
+def filter_key(segment, priority, ranges):
+    return (segment, priority) + tuple((col, float(lo), float(hi)) for col, (lo, hi) in sorted(ranges.items()))
+
+def filter_view(segment, priority, ranges):
+    rows = select_rows(fidx, ranges, segment, priority)
+    view_key = (data_version,) + filter_key(segment, priority, ranges)
+    filtered_df = rfm if rows is None else rfm.take(rows)
+    if stream is not None and rows is None:
+        agg = full_aggregates(stream, profs, data_version)
+        hists = stream['hists']
+    else:
+        agg = memoize_view(('agg', view_key), lambda: filtered_aggregates(cube, filtered_df, segment, priority, ranges))
+        hists = None
+    return rows, view_key, filtered_df, agg, hists
+
+POINT_BUDGETS = {1: 10000, 2: 50000, 3: 200000}
+MIN_POINTS_PER_CLUSTER = 200
+SCATTER_MAX_TRACES = 50
+
+def stratified_sample(df, budget, seed=42):
+    if len(df) <= budget:
+        return df
+    codes, _ = pd.factorize(df['Cluster_KMeans'])
+    counts = np.bincount(codes)
+    floor = np.minimum(counts, min(MIN_POINTS_PER_CLUSTER, budget // len(counts)))
+    spare = counts - floor
+    quota = floor + spare * (budget - floor.sum()) // max(spare.sum(), 1)
+    order = np.lexsort((np.random.default_rng(seed).random(len(df)), codes))
+    rank = np.empty(len(df), dtype=np.intp)
+    rank[order] = np.arange(len(df)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return df[rank < quota[codes]]
+
+def create_lorenz_chart(stats):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=[0, 1],
+        y=[0, 1],
+        mode='lines',
+        line=dict(color='rgba(255,255,255,0.3)', dash='dash'),
+        hoverinfo='skip',
+        showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=stats['lorenz_x'],
+        y=stats['lorenz_y'],
+        mode='lines',
+        fill='tonexty',
+        line=dict(color='#45B7D1', width=3),
+        fillcolor='rgba(69,183,209,0.2)',
+        hovertemplate='Customers: %{x:.1%}<br>Revenue share: %{y:.1%}<extra></extra>',
+        showlegend=False
+    ))
+    fig.update_layout(
+        title=dict(
+            text=f"📉 Revenue Concentration (Gini {stats['gini']:.2f})",
+            font=dict(color='white', size=30),
+            x=0.5,
+            xanchor='center'
+        ),
+        height=400,
+        xaxis=dict(
+            title=dict(text="Cumulative share of customers", font=dict(color='white')),
+            tickformat='.0%',
+            gridcolor='rgba(255,255,255,0.1)',
+            tickfont=dict(color='white')
+        ),
+        yaxis=dict(
+            title=dict(text="Cumulative share of revenue", font=dict(color='white')),
+            tickformat='.0%',
+            gridcolor='rgba(255,255,255,0.1)',
+            tickfont=dict(color='white')
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+def create_charts(df, agg, point_budget=POINT_BUDGETS[2], hists=None):
+    cc = agg['count'].sort_values(ascending=False)
     
     fig1 = go.Figure(go.Pie(
         labels=cc.index, 
@@ -725,8 +1513,8 @@ def create_charts(df):
         )
     )
     
-    if 'Monetary' in df.columns:
-        rv = df.groupby('Cluster_Label')['Monetary'].sum().sort_values()
+    if 'Monetary_sum' in agg.columns:
+        rv = agg['Monetary_sum'].sort_values()
         
         fig2 = go.Figure(go.Bar(
             x=rv.values, 
@@ -781,28 +1569,58 @@ def create_charts(df):
         )
     
     if all(col in df.columns for col in ['Recency', 'Frequency', 'Monetary']):
-        fig3 = go.Figure(go.Scatter3d(
-            x=df['Recency'], 
-            y=df['Frequency'], 
-            z=df['Monetary'],
-            mode='markers',
-            marker=dict(
-                size=6,
-                color=df['Cluster_KMeans'],
-                colorscale='Rainbow',
-                opacity=0.8,
-                line=dict(width=0)
-            ),
-            text=df['Cluster_Label'],
-            hovertemplate='<b>%{text}</b><br>' +
-                         'Recency: %{x}d<br>' +
-                         'Frequency: %{y}<br>' +
-                         'Monetary: £%{z:.0f}<br>' +
-                         '<extra></extra>'
-        ))
+        sample = stratified_sample(df, point_budget)
+        cid_min, cid_max = df['Cluster_KMeans'].min(), df['Cluster_KMeans'].max()
+        if cid_min == cid_max:
+            cid_min, cid_max = cid_min - 1, cid_max + 1
+        hover = ('Recency: %{x}d<br>' +
+                 'Frequency: %{y}<br>' +
+                 'Monetary: £%{z:.0f}<br>' +
+                 '<extra></extra>')
+        if sample['Cluster_KMeans'].nunique() <= SCATTER_MAX_TRACES:
+            # one trace per cluster so the hover can name its segment via the trace name
+            fig3 = go.Figure()
+            for cid, group in sample.groupby('Cluster_KMeans', sort=True):
+                fig3.add_trace(go.Scatter3d(
+                    x=group['Recency'], 
+                    y=group['Frequency'], 
+                    z=group['Monetary'],
+                    name=group['Cluster_Label'].iloc[0],
+                    mode='markers',
+                    showlegend=False,
+                    marker=dict(
+                        size=6,
+                        color=sample_colorscale(sequential.Rainbow, (cid - cid_min) / (cid_max - cid_min))[0],
+                        opacity=0.8,
+                        line=dict(width=0)
+                    ),
+                    hovertemplate='<b>%{fullData.name}</b><br>' + hover
+                ))
+        else:
+            fig3 = go.Figure(go.Scatter3d(
+                x=sample['Recency'], 
+                y=sample['Frequency'], 
+                z=sample['Monetary'],
+                customdata=sample['Cluster_KMeans'],
+                mode='markers',
+                showlegend=False,
+                marker=dict(
+                    size=6,
+                    color=sample['Cluster_KMeans'],
+                    colorscale=sequential.Rainbow,
+                    cmin=cid_min,
+                    cmax=cid_max,
+                    opacity=0.8,
+                    line=dict(width=0)
+                ),
+                hovertemplate='<b>Cluster C%{customdata}</b><br>' + hover
+            ))
+        scatter_title = "📈 3D RFM Analysis"
+        if len(sample) < len(df):
+            scatter_title += f"<br><sup>{len(sample):,} of {len(df):,} customers shown</sup>"
         fig3.update_layout(
             title=dict(
-                text="📈 3D RFM Analysis",
+                text=scatter_title,
                 font=dict(color='white', size=30),
                 x=0.5,
                 xanchor='center'
@@ -859,9 +1677,12 @@ def create_charts(df):
             )
             return fig
         
-        fig = go.Figure(go.Histogram(
-            x=df[column],
-            nbinsx=30,
+        counts, edges = hists[column] if hists and column in hists else histogram_bins(df[column])
+        fig = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            customdata=np.column_stack([edges[:-1], edges[1:]]),
+            hovertemplate='%{customdata[0]:.4~g} - %{customdata[1]:.4~g}<br>Count: %{y}<extra></extra>',
             marker_color=color,
             opacity=0.8,
             marker_line_color='#0f172a',
@@ -893,78 +1714,55 @@ def create_charts(df):
     fig5 = create_histogram(df, 'Frequency', '🔄 Frequency Distribution', '#4ECDC4')
     fig6 = create_histogram(df, 'Monetary', '💵 Monetary Distribution', '#45B7D1')
     
+    return fig1, fig2, fig3, fig4, fig5, fig6
+
+SEGMENT_TABLE_PAGE_SIZE = 10
+SEGMENT_TABLE_COLUMNS = {
+    'Count': ('Count', '', '', ''),
+    'Recency': ('Recency', '.0f', '', 'd'),
+    'Frequency': ('Frequency', '.1f', '', ''),
+    'Monetary': ('Monetary', ',.0f', '£', ''),
+    'AvgOrderValue': ('Avg Order', '.0f', '£', ''),
+    'RFM_Score': ('RFM Score', '.1f', '', '')
+}
+
+def segment_table(agg):
+    table = pd.DataFrame({'Count': agg['count']}, index=agg.index)
+    if all(f'{col}_sum' in agg.columns for col in AGG_COLS):
+        for col in AGG_COLS:
+            table[col] = agg_mean(agg, col).round(1)
+    return table.rename_axis('Segment')
+
+def create_segment_table(table, sort_by='Segment', descending=False, page=0):
     try:
-        segment_counts = df.groupby('Cluster_Label').size().reset_index(name='Count')
-        
-        if all(col in df.columns for col in ['Recency', 'Frequency', 'Monetary', 'AvgOrderValue', 'RFM_Score']):
-            rfm_stats = df.groupby('Cluster_Label').agg({
-                'Recency': 'mean',
-                'Frequency': 'mean', 
-                'Monetary': 'mean',
-                'AvgOrderValue': 'mean',
-                'RFM_Score': 'mean'
-            }).round(1).reset_index()
-            
-            segment_table = pd.merge(segment_counts, rfm_stats, on='Cluster_Label')
-            
-            segment_table['Recency'] = segment_table['Recency'].apply(lambda x: f"{x:.0f}d")
-            segment_table['Frequency'] = segment_table['Frequency'].apply(lambda x: f"{x:.1f}")
-            segment_table['Monetary'] = segment_table['Monetary'].apply(lambda x: f"£{x:,.0f}")
-            segment_table['AvgOrderValue'] = segment_table['AvgOrderValue'].apply(lambda x: f"£{x:.0f}")
-            segment_table['RFM_Score'] = segment_table['RFM_Score'].apply(lambda x: f"{x:.1f}")
-            
-            segment_table = segment_table[['Cluster_Label', 'Count', 'Recency', 'Frequency', 
-                                         'Monetary', 'AvgOrderValue', 'RFM_Score']]
-            
-            fig7 = go.Figure(data=[go.Table(
-                header=dict(
-                    values=['<b>Segment</b>', '<b>Count</b>', '<b>Recency</b>', '<b>Frequency</b>',
-                            '<b>Monetary</b>', '<b>Avg Order</b>', '<b>RFM Score</b>'],
-                    fill_color='#1e293b',
-                    align='center',
-                    font=dict(color='white', size=12),
-                    height=40,
-                    line=dict(color='#334155')
-                ),
-                cells=dict(
-                    values=[
-                        segment_table['Cluster_Label'],
-                        segment_table['Count'],
-                        segment_table['Recency'],
-                        segment_table['Frequency'],
-                        segment_table['Monetary'],
-                        segment_table['AvgOrderValue'],
-                        segment_table['RFM_Score']
-                    ],
-                    fill_color=['rgba(30, 41, 59, 0.6)', 'rgba(30, 41, 59, 0.4)'],
-                    align='center',
-                    font=dict(size=11, color='white'),
-                    height=35,
-                    line=dict(color='#334155')
-                )
-            )])
+        if sort_by == 'Segment':
+            ordered = table.sort_index(ascending=not descending, kind='stable')
         else:
-            segment_table = segment_counts.copy()
-            segment_table = segment_table.rename(columns={'Cluster_Label': 'Segment'})
-            
-            fig7 = go.Figure(data=[go.Table(
-                header=dict(
-                    values=['<b>Segment</b>', '<b>Count</b>'],
-                    fill_color='#1e293b',
-                    align='center',
-                    font=dict(color='white', size=12),
-                    height=40,
-                    line=dict(color='#334155')
-                ),
-                cells=dict(
-                    values=[segment_table['Segment'], segment_table['Count']],
-                    fill_color=['rgba(30, 41, 59, 0.6)', 'rgba(30, 41, 59, 0.4)'],
-                    align='center',
-                    font=dict(size=11, color='white'),
-                    height=35,
-                    line=dict(color='#334155')
-                )
-            )])
+            ordered = table.sort_values(sort_by, ascending=not descending, kind='stable')
+        rows = ordered.iloc[page * SEGMENT_TABLE_PAGE_SIZE:(page + 1) * SEGMENT_TABLE_PAGE_SIZE]
+        specs = [SEGMENT_TABLE_COLUMNS[col] for col in rows.columns]
+        
+        fig7 = go.Figure(data=[go.Table(
+            header=dict(
+                values=['<b>Segment</b>'] + [f'<b>{spec[0]}</b>' for spec in specs],
+                fill_color='#1e293b',
+                align='center',
+                font=dict(color='white', size=12),
+                height=40,
+                line=dict(color='#334155')
+            ),
+            cells=dict(
+                values=[rows.index] + [rows[col] for col in rows.columns],
+                format=[''] + [spec[1] for spec in specs],
+                prefix=[''] + [spec[2] for spec in specs],
+                suffix=[''] + [spec[3] for spec in specs],
+                fill_color=['rgba(30, 41, 59, 0.6)', 'rgba(30, 41, 59, 0.4)'],
+                align='center',
+                font=dict(size=11, color='white'),
+                height=35,
+                line=dict(color='#334155')
+            )
+        )])
         
         fig7.update_layout(
             title=dict(
@@ -973,7 +1771,7 @@ def create_charts(df):
                 x=0.5,
                 xanchor='center'
             ),
-            height=400,
+            height=max(400, 160 + 35 * len(rows)),
             margin=dict(t=100, b=20, l=20, r=20),
             plot_bgcolor='rgba(0,0,0,0)',
             paper_bgcolor='rgba(0,0,0,0)'
@@ -999,13 +1797,83 @@ def create_charts(df):
             )]
         )
     
-    return fig1, fig2, fig3, fig4, fig5, fig6, fig7
+    return fig7
+
+@contextmanager
+def fragment_scope(name):
+    global perf_run
+    if 'clock' in perf_run:
+        with perf_stage(name):
+            yield
+        return
+    perf_run = start_run(name)
+    try:
+        yield
+    finally:
+        finish_run()
+
+def finish_run():
+    run = perf_run
+    run['total'] = time.perf_counter() - run.pop('clock')
+    if tracemalloc.is_tracing():
+        run['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        if run['traced']:
+            tracemalloc.stop()
+    del run['traced']
+    cache = view_cache()
+    run['view_hits'], run['view_misses'] = cache['hits'], cache['misses']
+    run['version'] = data_version
+    run['sketch_ms'] = fidx['sketch_ms']
+    if PERF_LOG:
+        with open(PERF_LOG, 'a') as f:
+            f.write(json.dumps(run) + '\n')
+    history = st.session_state.setdefault('perf_history', deque(maxlen=PERF_HISTORY))
+    history.append(run)
+    return history
+
+@st.cache_resource(max_entries=DATASET_VERSIONS)
+def memory_report(_rfm, version):
+    rfm = _rfm
+    usage = rfm.memory_usage(deep=True) / 2**20
+    labels = rfm.select_dtypes('category').columns
+    as_objects = sum(8 * len(rfm) + sum(sys.getsizeof(str(c)) for c in rfm[col].cat.categories) for col in labels)
+    return {'columns': usage.round(2), 'labels_mb': usage[labels].sum(), 'labels_object_mb': as_objects / 2**20}
+
+def render_perf_panel(history):
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        last = history[-1]
+        cache = view_cache()
+        lookups = cache['hits'] + cache['misses']
+        st.caption(f"View cache: {cache['hits']:,} hits / {cache['misses']:,} misses ({cache['hits'] / lookups * 100 if lookups else 0:.0f}% hit rate), {len(cache['entries'])}/{VIEW_CACHE_SIZE} entries")
+        if last['peak_mb'] is not None:
+            st.caption(f"Peak traced memory this rerun: {last['peak_mb']:.1f} MB")
+        memory = memory_report(rfm, data_version)
+        st.caption(f"Dataset: {memory['columns'].sum():.1f} MB; label columns {memory['labels_mb']:.2f} MB as categoricals vs ≥{memory['labels_object_mb']:.1f} MB as object columns; quantile sketch built in {fidx['sketch_ms']:.1f} ms")
+        runs = pd.DataFrame([{'total': r['total'], **r['stages']} for r in reversed(history)]).mul(1000).round(1)
+        runs.insert(0, 'scope', [r['scope'] for r in reversed(history)])
+        st.markdown(f"**Last {len(history)} reruns (ms)**")
+        st.dataframe(runs, use_container_width=True, hide_index=True)
+        if last['charts']:
+            st.markdown("**Plotly payload (KB)**")
+            st.dataframe(pd.Series(last['charts'], name='KB').div(1024).round(1), use_container_width=True)
 
 with st.sidebar:
     st.markdown("### ⚙️ Dashboard Controls")
     
     st.markdown("#### 📊 Data Settings")
     refresh_data = st.button("🔄 Refresh Data", use_container_width=True)
+    if refresh_data:
+        with st.spinner("Checking for new segment data..."):
+            st.session_state['refresh_result'] = refresh_dataset() or 'unchanged'
+        st.rerun()
+    
+    refresh_result = st.session_state.pop('refresh_result', None)
+    if refresh_result == 'unchanged':
+        st.toast("Data is already up to date")
+    elif refresh_result:
+        st.toast(f"Reloaded: {refresh_result['changed']:,} changed, {refresh_result['removed']:,} removed customers across {refresh_result['clusters']} clusters")
+    
+    st.caption(f"📁 Data version {data_version[:16]}")
     
     st.markdown("---")
     
@@ -1025,7 +1893,7 @@ with st.sidebar:
     st.markdown("---")
     
     st.markdown("#### 📱 Display Settings")
-    st.slider("Chart Quality", 1, 3, 2)
+    chart_quality = st.slider("Chart Quality", 1, 3, 2)
     
     st.markdown("---")
     
@@ -1038,6 +1906,8 @@ with st.sidebar:
         4. **Get insights** in the AI Insights tab
         """)
 
+TABS = ["📊 Analytics Dashboard", "🎯 Growth Strategies", "💡 AI Insights"]
+
 def main():
     st.markdown("""
     <div class="header-container">
@@ -1062,8 +1932,7 @@ def main():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_customers = len(rfm)
-        segment_count = rfm['Cluster_KMeans'].nunique()
+        total_customers = summary['total_customers']
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-icon">👥</div>
@@ -1076,8 +1945,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col2:
-        total_rev = rfm['Monetary'].sum() if 'Monetary' in rfm.columns else 0
-        avg_rev = rfm['Monetary'].mean() if 'Monetary' in rfm.columns else 0
+        total_rev = summary['total_rev']
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-icon">💰</div>
@@ -1090,8 +1958,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col3:
-        avg_order = rfm['AvgOrderValue'].mean() if 'AvgOrderValue' in rfm.columns else 0
-        max_order = rfm['AvgOrderValue'].max() if 'AvgOrderValue' in rfm.columns else 0
+        avg_order = summary['avg_order']
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-icon">📈</div>
@@ -1104,8 +1971,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col4:
-        champion_count = len(rfm[rfm['Cluster_Label'].str.contains('Champions')]) if 'Cluster_Label' in rfm.columns else 0
-        champion_pct = (champion_count / len(rfm) * 100) if len(rfm) > 0 else 0
+        champion_pct = summary['champion_pct']
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-icon">🏆</div>
@@ -1119,14 +1985,33 @@ def main():
     
     st.markdown('</div>', unsafe_allow_html=True)
     
-    st.markdown("""
-    <div class="section-header">
-        <div>
-            <div class="section-title">Smart Filters</div>
-            <div class="section-subtitle">Refine and segment your customer data with precision controls</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    dashboard()
+
+RANGE_WIDGETS = ['rfm_filter', 'monetary_filter', 'frequency_filter', 'recency_filter']
+
+def applied_filters():
+    applied = st.session_state.get('applied_filters')
+    if applied is None or applied.get('version') != data_version:
+        segment = applied['segment'] if applied and applied['segment'] in profs else 'all'
+        if segment == 'all':
+            st.session_state.pop('segment_filter', None)
+        for key in RANGE_WIDGETS:
+            st.session_state.pop(key, None)
+        applied = st.session_state['applied_filters'] = {
+            'version': data_version,
+            'segment': segment,
+            'priority': applied['priority'] if applied else 'all',
+            'ranges': {col: tuple(domain) for col, domain in domains.items()}
+        }
+    return applied
+
+@st.fragment
+def filter_panel():
+    with fragment_scope('filters'):
+        render_filter_panel()
+
+def render_filter_panel():
+    applied = applied_filters()
     
     with st.container():
         st.markdown('<div class="filter-section">', unsafe_allow_html=True)
@@ -1160,8 +2045,7 @@ def main():
             st.markdown('<div class="custom-label">📊 RFM Score Range</div>', unsafe_allow_html=True)
             
             if 'RFM_Score' in rfm.columns:
-                rfm_min = int(rfm['RFM_Score'].min())
-                rfm_max = int(rfm['RFM_Score'].max())
+                rfm_min, rfm_max = domains['RFM_Score']
                 rfm_filter = st.slider(
                     "",
                     min_value=rfm_min,
@@ -1209,20 +2093,20 @@ def main():
             
             with col1:
                 if 'Monetary' in rfm.columns:
-                    monetary_min = float(rfm['Monetary'].min())
-                    monetary_max = float(rfm['Monetary'].max())
-                    monetary_filter = st.slider(
+                    monetary_steps = slider_steps(fidx['sketch']['Monetary'])
+                    monetary_filter = st.select_slider(
                         "💰 Monetary Value Range",
-                        min_value=monetary_min,
-                        max_value=monetary_max,
-                        value=[monetary_min, monetary_max],
+                        options=monetary_steps,
+                        value=(monetary_steps[0], monetary_steps[-1]),
+                        format_func=lambda v: f"£{v:,.0f}",
                         key="monetary_filter"
                     )
+                    share = sketch_share(fidx['sketch']['Monetary'], *monetary_filter)
+                    st.caption(f"{share:.0%} of customers · steps follow spend percentiles")
             
             with col2:
                 if 'Frequency' in rfm.columns:
-                    freq_min = int(rfm['Frequency'].min())
-                    freq_max = int(rfm['Frequency'].max())
+                    freq_min, freq_max = domains['Frequency']
                     frequency_filter = st.slider(
                         "🔄 Frequency Range",
                         min_value=freq_min,
@@ -1233,8 +2117,7 @@ def main():
             
             with col3:
                 if 'Recency' in rfm.columns:
-                    recency_min = int(rfm['Recency'].min())
-                    recency_max = int(rfm['Recency'].max())
+                    recency_min, recency_max = domains['Recency']
                     recency_filter = st.slider(
                         "⏰ Recency Range (days)",
                         min_value=recency_min,
@@ -1246,37 +2129,63 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
-    filtered_df = rfm.copy()
-    
+    ranges = {}
     if 'RFM_Score' in rfm.columns:
-        filtered_df = filtered_df[
-            (filtered_df['RFM_Score'] >= rfm_filter[0]) & 
-            (filtered_df['RFM_Score'] <= rfm_filter[1])
-        ]
-    
-    if segment_filter != 'all':
-        filtered_df = filtered_df[filtered_df['Cluster_KMeans'] == segment_filter]
-    
-    if priority_filter != 'all' and 'Priority' in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df['Priority'] == priority_filter]
-    
-    if 'monetary_filter' in locals() and 'Monetary' in filtered_df.columns:
-        filtered_df = filtered_df[
-            (filtered_df['Monetary'] >= monetary_filter[0]) & 
-            (filtered_df['Monetary'] <= monetary_filter[1])
-        ]
-    
-    if 'frequency_filter' in locals() and 'Frequency' in filtered_df.columns:
-        filtered_df = filtered_df[
-            (filtered_df['Frequency'] >= frequency_filter[0]) & 
-            (filtered_df['Frequency'] <= frequency_filter[1])
-        ]
-    
-    if 'recency_filter' in locals() and 'Recency' in filtered_df.columns:
-        filtered_df = filtered_df[
-            (filtered_df['Recency'] >= recency_filter[0]) & 
-            (filtered_df['Recency'] <= recency_filter[1])
-        ]
+        ranges['RFM_Score'] = rfm_filter
+    if 'monetary_filter' in locals():
+        ranges['Monetary'] = monetary_filter
+    if 'frequency_filter' in locals():
+        ranges['Frequency'] = frequency_filter
+    if 'recency_filter' in locals():
+        ranges['Recency'] = recency_filter
+    
+    staged = {'version': data_version, 'segment': segment_filter, 'priority': priority_filter, 'ranges': {col: tuple(v) for col, v in ranges.items()}}
+    with perf_stage('match_count'):
+        matching = count_rows(fidx, staged['ranges'], segment_filter, priority_filter)
+    if stream is not None:
+        matching = f"≈ {round(matching * summary['total_customers'] / max(fidx['n'], 1)):,}"
+    else:
+        matching = f"{matching:,}"
+    
+    st.session_state['staged_filters'] = staged
+    pending = " · press Apply Filters to update the dashboard" if staged != applied else ""
+    st.markdown(f'<div class="custom-label">{matching} matching customers{pending}</div>', unsafe_allow_html=True)
+
+def apply_staged_filters():
+    st.session_state['applied_filters'] = st.session_state['staged_filters']
+
+@st.fragment
+def dashboard():
+    with fragment_scope('dashboard'):
+        render_dashboard()
+
+def render_dashboard():
+    st.markdown("""
+    <div class="section-header">
+        <div>
+            <div class="section-title">Smart Filters</div>
+            <div class="section-subtitle">Refine and segment your customer data with precision controls</div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    filter_panel()
+    applied = applied_filters()
+    _, col2 = st.columns([3, 1])
+    with col2:
+        st.button("✅ Apply Filters", key="apply_filters", type="primary", on_click=apply_staged_filters, use_container_width=True)
+    
+    with perf_stage('filters'):
+        rows, view_key, filtered_df, agg, hists = filter_view(applied['segment'], applied['priority'], applied['ranges'])
+    
+    if stream is not None:
+        sample_note = f"a {len(rfm):,}-customer sample"
+        if rows is None:
+            scope = f"Segment charts, histograms, the segment table and the Data Summary use all customers; the 3D scatter and revenue concentration use {sample_note}"
+        else:
+            scope = f"Filters apply to {sample_note}, so all views below are computed from it"
+        st.info(f"📦 {summary['total_customers']:,} customers were streamed into summaries. {scope}.")
+    
     
     st.markdown("""
     <div class="section-header">
@@ -1287,50 +2196,74 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["📊 Analytics Dashboard", "🎯 Growth Strategies", "💡 AI Insights"])
+    active_tab = st.radio("", TABS, horizontal=True, key="active_tab", label_visibility="collapsed")
     
-    with tab1:
+    if active_tab == TABS[0]:
         if len(filtered_df) > 0:
-            fig1, fig2, fig3, fig4, fig5, fig6, fig7 = create_charts(filtered_df)
+            with perf_stage('charts'):
+                fig1, fig2, fig3, fig4, fig5, fig6 = memoize_view(
+                    ('charts', view_key, chart_quality),
+                    lambda: create_charts(filtered_df, agg, POINT_BUDGETS[chart_quality], hists)
+                )
+                table = memoize_view(('segment_table', view_key), lambda: segment_table(agg))
             
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-                st.plotly_chart(fig1, use_container_width=True, config={'displayModeBar': True})
+                plotly_chart(fig1, 'segment_pie', use_container_width=True, config={'displayModeBar': True})
                 st.markdown('</div>', unsafe_allow_html=True)
             
             with col2:
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-                st.plotly_chart(fig2, use_container_width=True, config={'displayModeBar': True})
+                plotly_chart(fig2, 'segment_revenue', use_container_width=True, config={'displayModeBar': True})
                 st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="chart-container chart-full">', unsafe_allow_html=True)
-            st.plotly_chart(fig3, use_container_width=True, config={'displayModeBar': True})
+            plotly_chart(fig3, 'rfm_3d', use_container_width=True, config={'displayModeBar': True})
             st.markdown('</div>', unsafe_allow_html=True)
             
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-                st.plotly_chart(fig4, use_container_width=True, config={'displayModeBar': False})
+                plotly_chart(fig4, 'recency_hist', use_container_width=True, config={'displayModeBar': False})
                 st.markdown('</div>', unsafe_allow_html=True)
             
             with col2:
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-                st.plotly_chart(fig5, use_container_width=True, config={'displayModeBar': False})
+                plotly_chart(fig5, 'frequency_hist', use_container_width=True, config={'displayModeBar': False})
                 st.markdown('</div>', unsafe_allow_html=True)
             
             with col3:
                 st.markdown('<div class="chart-container">', unsafe_allow_html=True)
-                st.plotly_chart(fig6, use_container_width=True, config={'displayModeBar': False})
+                plotly_chart(fig6, 'monetary_hist', use_container_width=True, config={'displayModeBar': False})
                 st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="chart-container chart-full">', unsafe_allow_html=True)
-            st.plotly_chart(fig7, use_container_width=True, config={'displayModeBar': False})
+            table_slot = st.container()
+            pages = max(1, -(-len(table) // SEGMENT_TABLE_PAGE_SIZE))
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                sort_by = st.selectbox(
+                    "Sort segments by",
+                    ['Segment'] + list(table.columns),
+                    format_func=lambda c: 'Segment' if c == 'Segment' else SEGMENT_TABLE_COLUMNS[c][0],
+                    key="table_sort"
+                )
+            with col2:
+                descending = st.toggle("Descending", value=False, key="table_desc")
+            with col3:
+                page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="table_page") if pages > 1 else 1
+            page = min(page, pages) - 1
+            
+            with perf_stage('charts'):
+                fig7 = memoize_view(('table', view_key, sort_by, descending, page), lambda: create_segment_table(table, sort_by, descending, page))
+            with table_slot:
+                plotly_chart(fig7, 'segment_table', use_container_width=True, config={'displayModeBar': False})
             st.markdown('</div>', unsafe_allow_html=True)
             
             with st.expander("📋 Data Summary"):
                 st.dataframe(
-                    filtered_df.describe(),
+                    agg_summary(agg),
                     use_container_width=True
                 )
         else:
@@ -1342,9 +2275,9 @@ def main():
             </div>
             """, unsafe_allow_html=True)
     
-    with tab2:
-        champion_clusters = [c for c in filtered_df['Cluster_KMeans'].unique() 
-                        if c in profs and profs[c]['name'] == '🏆 Champions']
+    if active_tab == TABS[1]:
+        champions = champion_ids(profs)
+        champion_clusters = [c for c in agg['cluster_id'] if c in champions]
 
         if len(champion_clusters) > 0:
             st.markdown('<div class="champion-title">Champion Segments Breakdown</div>', unsafe_allow_html=True)
@@ -1362,142 +2295,66 @@ def main():
                         </div>
                         """, unsafe_allow_html=True)
         
-        st.markdown("""
-        <div class="section-header">
-            <div>
-                <div class="section-title">Selling Strategy</div>
-                <div class="section-subtitle">Interactive selling strategies based on customer segments</div>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        strategy_cards()
 
-        segment_names = list(cluster_full_details.keys())
-        selected_segment = st.selectbox(
-            "🎯 Select Customer Segment",
-            segment_names,
-            index=0,
-            key="selling_strategy_segment"
-        )
-        
-        details = cluster_full_details[selected_segment]
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="insight-card">
-                <div class="insight-card-header">
-                    <div class="insight-card-title">📊 Characteristics</div>
-                    <div class="insight-card-subtitle">Customer profile and behavior</div>
-                </div>
-                <div class="detail-content">
-                    {format_content(details['characteristics'])}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown(f"""
-            <div class="insight-card" style="margin-top: 1.5rem;">
-                <div class="insight-card-header">
-                    <div class="insight-card-title">🎯 Main Strategy</div>
-                    <div class="insight-card-subtitle">Strategic approach for this segment</div>
-                </div>
-                <div class="detail-content">
-                    {format_content(details['strategy'])}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class="insight-card">
-                <div class="insight-card-header">
-                    <div class="insight-card-title">⚙️ Sales Actions</div>
-                    <div class="insight-card-subtitle">Specific implementation tactics</div>
-                </div>
-                <div class="detail-content">
-                    {format_content(details['actions'])}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown(f"""
-            <div class="insight-card" style="margin-top: 1.5rem;">
-                <div class="insight-card-header">
-                    <div class="insight-card-title">📈 KPI Targets</div>
-                    <div class="insight-card-subtitle">Expected performance indicators</div>
-                </div>
-                <div class="detail-content">
-                    {format_content(details['kpis'])}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-    with tab3:
+    if active_tab == TABS[2]:
         if len(filtered_df) > 0:
-            if 'Cluster_Label' in filtered_df.columns:
-                if 'Monetary' in filtered_df.columns:
-                    highest_revenue = filtered_df.groupby('Cluster_Label')['Monetary'].sum()
-                    highest_revenue_segment = highest_revenue.idxmax() if not highest_revenue.empty else "N/A"
-                    highest_revenue_value = highest_revenue.max() if not highest_revenue.empty else 0
-                else:
-                    highest_revenue_segment = "N/A"
-                    highest_revenue_value = 0
-                
-                largest_group = filtered_df['Cluster_Label'].value_counts()
-                largest_group_segment = largest_group.idxmax() if not largest_group.empty else "N/A"
-                largest_group_count = largest_group.max() if not largest_group.empty else 0
-                
-                if 'AvgOrderValue' in filtered_df.columns:
-                    best_aov = filtered_df.groupby('Cluster_Label')['AvgOrderValue'].mean()
-                    best_aov_segment = best_aov.idxmax() if not best_aov.empty else "N/A"
-                    best_aov_value = best_aov.max() if not best_aov.empty else 0
-                else:
-                    best_aov_segment = "N/A"
-                    best_aov_value = 0
-                
-                if 'Frequency' in filtered_df.columns:
-                    most_frequent = filtered_df.groupby('Cluster_Label')['Frequency'].mean()
-                    most_frequent_segment = most_frequent.idxmax() if not most_frequent.empty else "N/A"
-                    most_frequent_value = most_frequent.max() if not most_frequent.empty else 0
-                else:
-                    most_frequent_segment = "N/A"
-                    most_frequent_value = 0
+            if 'Monetary_sum' in agg.columns:
+                highest_revenue = agg['Monetary_sum']
+                highest_revenue_segment = highest_revenue.idxmax() if not highest_revenue.empty else "N/A"
+                highest_revenue_value = highest_revenue.max() if not highest_revenue.empty else 0
             else:
                 highest_revenue_segment = "N/A"
                 highest_revenue_value = 0
-                largest_group_segment = "N/A"
-                largest_group_count = 0
+            
+            largest_group = agg['count']
+            largest_group_segment = largest_group.idxmax() if not largest_group.empty else "N/A"
+            largest_group_count = largest_group.max() if not largest_group.empty else 0
+            
+            if 'AvgOrderValue_sum' in agg.columns:
+                best_aov = agg_mean(agg, 'AvgOrderValue')
+                best_aov_segment = best_aov.idxmax() if not best_aov.empty else "N/A"
+                best_aov_value = best_aov.max() if not best_aov.empty else 0
+            else:
                 best_aov_segment = "N/A"
                 best_aov_value = 0
+            
+            if 'Frequency_sum' in agg.columns:
+                most_frequent = agg_mean(agg, 'Frequency')
+                most_frequent_segment = most_frequent.idxmax() if not most_frequent.empty else "N/A"
+                most_frequent_value = most_frequent.max() if not most_frequent.empty else 0
+            else:
                 most_frequent_segment = "N/A"
                 most_frequent_value = 0
             
+            avg_recency = agg_total_mean(agg, 'Recency') if 'Recency_sum' in agg.columns else 0
+            avg_frequency = agg_total_mean(agg, 'Frequency') if 'Frequency_sum' in agg.columns else 0
+            champion_count = agg.loc[agg['cluster_id'].isin(champion_ids(profs)), 'count'].sum()
+            customer_count = agg['count'].sum()
+            
             insights_list = [
                 f"🏆 Highest Revenue: {highest_revenue_segment} (£{highest_revenue_value/1000:.1f}K)",
                 f"👥 Largest Segment: {largest_group_segment} ({largest_group_count:,} customers)",
                 f"💰 Best AOV: {best_aov_segment} (£{best_aov_value:.0f})",
                 f"🔄 Most Frequent: {most_frequent_segment} ({most_frequent_value:.1f} orders)",
-                f"📈 Champion Ratio: {(len(filtered_df[filtered_df['Cluster_Label'].str.contains('Champions')]) / len(filtered_df) * 100 if len(filtered_df) > 0 else 0):.1f}%",
-                f"⏰ Avg Recency: {filtered_df['Recency'].mean():.1f} days" if 'Recency' in filtered_df.columns else "⏰ Avg Recency: N/A"
+                f"📈 Champion Ratio: {(champion_count / customer_count * 100 if customer_count > 0 else 0):.1f}%",
+                f"⏰ Avg Recency: {avg_recency:.1f} days" if 'Recency_sum' in agg.columns else "⏰ Avg Recency: N/A"
             ]
             
             insight_items_html = ""
             for insight in insights_list:
                 insight_items_html += f"<li>{insight}</li>"
             
-            concentration_pct = (largest_group_count / len(filtered_df) * 100) if len(filtered_df) > 0 else 0
+            concentration_pct = (largest_group_count / customer_count * 100) if customer_count > 0 else 0
             
-            if 'Monetary' in filtered_df.columns:
-                top_20_percent = filtered_df.nlargest(max(1, int(len(filtered_df) * 0.2)), 'Monetary')
-                total_revenue = filtered_df['Monetary'].sum()
-                revenue_concentration = (top_20_percent['Monetary'].sum() / total_revenue * 100) if total_revenue > 0 else 0
+            if 'prefix' in fidx:
+                with perf_stage('concentration'):
+                    concentration = memoize_view(('concentration', view_key), lambda: concentration_stats(fidx, rows))
+                revenue_concentration = concentration['top_share']
             else:
+                concentration = None
                 revenue_concentration = 0
             
-            avg_recency = filtered_df['Recency'].mean() if 'Recency' in filtered_df.columns else 0
-            avg_frequency = filtered_df['Frequency'].mean() if 'Frequency' in filtered_df.columns else 0
-            
             insights_html = f"""
             <div class="insights-section">
                 <div class="insights-title">🧠 AI-Powered Insights & Recommendations</div>
@@ -1566,7 +2423,15 @@ def main():
             </div>
             """
             
-            st.markdown(insights_html, unsafe_allow_html=True)
+            with perf_stage('markdown'):
+                st.markdown(insights_html, unsafe_allow_html=True)
+            
+            if concentration is not None:
+                st.markdown('<div class="chart-container chart-full">', unsafe_allow_html=True)
+                plotly_chart(create_lorenz_chart(concentration), 'lorenz', use_container_width=True, config={'displayModeBar': False})
+                st.markdown('</div>', unsafe_allow_html=True)
+                if stream is not None:
+                    st.caption(f"Revenue concentration is estimated from a {len(rfm):,}-customer sample of the streamed file.")
             
         else:
             st.markdown("""
@@ -1576,6 +2441,89 @@ def main():
                 <p>Try adjusting your filters to see insights</p>
             </div>
             """, unsafe_allow_html=True)
+
+@st.fragment
+def strategy_cards():
+    with fragment_scope('strategy'):
+        render_strategy_cards()
+
+def render_strategy_cards():
+    st.markdown("""
+    <div class="section-header">
+        <div>
+            <div class="section-title">Selling Strategy</div>
+            <div class="section-subtitle">Interactive selling strategies based on customer segments</div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    segment_names = list(cluster_full_details.keys())
+    selected_segment = st.selectbox(
+        "🎯 Select Customer Segment",
+        segment_names,
+        index=0,
+        key="selling_strategy_segment"
+    )
+    
+    details = cluster_full_details[selected_segment]
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown(f"""
+        <div class="insight-card">
+            <div class="insight-card-header">
+                <div class="insight-card-title">📊 Characteristics</div>
+                <div class="insight-card-subtitle">Customer profile and behavior</div>
+            </div>
+            <div class="detail-content">
+                {format_content(details['characteristics'])}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown(f"""
+        <div class="insight-card" style="margin-top: 1.5rem;">
+            <div class="insight-card-header">
+                <div class="insight-card-title">🎯 Main Strategy</div>
+                <div class="insight-card-subtitle">Strategic approach for this segment</div>
+            </div>
+            <div class="detail-content">
+                {format_content(details['strategy'])}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
     
+    with col2:
+        st.markdown(f"""
+        <div class="insight-card">
+            <div class="insight-card-header">
+                <div class="insight-card-title">⚙️ Sales Actions</div>
+                <div class="insight-card-subtitle">Specific implementation tactics</div>
+            </div>
+            <div class="detail-content">
+                {format_content(details['actions'])}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.markdown(f"""
+        <div class="insight-card" style="margin-top: 1.5rem;">
+            <div class="insight-card-header">
+                <div class="insight-card-title">📈 KPI Targets</div>
+                <div class="insight-card-subtitle">Expected performance indicators</div>
+            </div>
+            <div class="detail-content">
+                {format_content(details['kpis'])}
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        history = finish_run()
+    if PERF_ENABLED:
+        render_perf_panel(history)
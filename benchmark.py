@@ -0,0 +1,529 @@
+import argparse
+import asyncio
+import gc
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+from pandas.core.strings.accessor import StringMethods
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+SERVE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serve.py')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+SIZES = [10000, 1000000, 10000000]
+PAYLOAD_ELEMENTS = ['plotly_chart', 'markdown', 'arrow_data_frame']
+SERVER_PORT = 8599
+PROFILING_ROWS = 10000000
+PROFILING_CLUSTERS = 1000
+LEGACY_CLUSTERS = 20
+SNAPSHOT_ROWS = 1000000
+FILTER_ROWS = 1000000
+FILTER_REPEATS = 5
+SESSION_ROWS = 1000000
+SESSION_COUNTS = [1, 5, 10, 20]
+PASS_ROWS = 1000000
+STREAM_ROWS = 32000000
+
+STREAM_PROBE = '''
+import importlib.util, json, logging, os, sys, time
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+logging.disable(logging.WARNING)
+spec = importlib.util.spec_from_file_location('app', sys.argv[1])
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+
+def status(key):
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(key)) / 1024
+
+with open('/proc/self/clear_refs', 'w') as f:
+    f.write('5')
+before = status('VmRSS')
+started = time.perf_counter()
+sample, version, stream = app.load_segments(sys.argv[2])
+print(json.dumps({'rows': stream['rows'], 'latency_ms': (time.perf_counter() - started) * 1000, 'peak_mb': status('VmHWM') - before}))
+'''
+
+LATENCY_TOLERANCE = 0.5
+LATENCY_SLACK_MS = 50
+PAYLOAD_TOLERANCE = 0.1
+MEMORY_TOLERANCE = 0.25
+MEMORY_SLACK_MB = 5
+
+os.environ.setdefault('RFM_WATCH_INTERVAL', '0')
+os.environ['RFM_PERF'] = '1'
+
+import streamlit as st
+from streamlit import logger
+from streamlit.testing.v1 import AppTest
+
+from sample_data import write_segments
+
+logger.set_log_level('error')
+
+def payload_bytes(at):
+    total = 0
+    for kind in PAYLOAD_ELEMENTS:
+        for element in at.get(kind):
+            total += element.proto.ByteSize()
+    return total
+
+def measure(at, timeout):
+    started = time.perf_counter()
+    at.run(timeout=timeout)
+    latency = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    run = at.session_state['perf_history'][-1]
+    return {
+        'latency_ms': latency * 1000,
+        'payload_kb': payload_bytes(at) / 1024,
+        'peak_mb': run['peak_mb'] or 0.0,
+        'sketch_ms': run['sketch_ms'],
+        'match_ms': run['stages'].get('match_count', 0.0) * 1000,
+    }
+
+def commit(at, timeout):
+    at.run(timeout=timeout)
+    at.button(key='apply_filters').click()
+
+def option_value(label):
+    return float(label.lstrip('£').replace(',', ''))
+
+def drag(at, key, fractions, timeout=None):
+    kind = 'select_slider' if any(w.key == key for w in at.select_slider) else 'slider'
+    widget = getattr(at, kind)(key=key)
+    if kind == 'select_slider':
+        options = [option_value(o) for o in widget.options]
+        stops = [options[round((len(options) - 1) * frac)] for frac in fractions]
+    else:
+        stops = [widget.min + (widget.max - widget.min) * frac for frac in fractions]
+    for hi in stops:
+        widget = getattr(at, kind)(key=key)
+        widget.set_value([widget.value[0], hi])
+        if timeout:
+            commit(at, timeout)
+        yield
+
+def pick(at, key, indices, timeout):
+    for index in indices:
+        at.selectbox(key=key).select_index(index)
+        commit(at, timeout)
+        yield
+
+def switch_tab(at, indices):
+    for index in indices:
+        radio = at.radio(key='active_tab')
+        radio.set_value(radio.options[index])
+        yield
+
+def session(at, timeout):
+    yield 'warm_rerun', iter([None])
+    yield 'monetary_stage', drag(at, 'monetary_filter', [0.9, 0.7, 0.5, 0.3])
+    for key in ['monetary_filter', 'frequency_filter', 'recency_filter']:
+        yield key.replace('_filter', '_drag'), drag(at, key, [0.9, 0.7, 0.5, 0.3, 1.0], timeout)
+    yield 'segment_switch', pick(at, 'segment_filter', [1, 2, 3, 0], timeout)
+    yield 'tab_change', switch_tab(at, [1, 2, 0])
+
+def summarize(samples):
+    return {metric: float(np.median([s[metric] for s in samples])) for metric in samples[0]}
+
+def bench_size(rows, timeout):
+    os.environ['RFM_SAMPLE_ROWS'] = str(rows)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    results = {'cold_load': measure(at, timeout)}
+    for name, steps in session(at, timeout):
+        samples = [measure(at, timeout) for _ in steps]
+        results[name] = summarize(samples)
+    return results
+
+async def first_paint(port):
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    started = time.perf_counter()
+    received = 0
+    async with websockets.connect(f'ws://localhost:{port}/_stcore/stream', max_size=None, subprotocols=['streamlit']) as ws:
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        await ws.send(msg.SerializeToString())
+        while True:
+            raw = await ws.recv()
+            received += len(raw)
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            if forward.WhichOneof('type') == 'script_finished':
+                return time.perf_counter() - started, received
+
+def wait_ready(url, proc, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+def bench_first_paint(rows, timeout):
+    results = {}
+    for name, script, ready in [('first_paint_cold', APP, '/_stcore/health'), ('first_paint_warm', SERVE, '/health')]:
+        env = dict(os.environ, RFM_SAMPLE_ROWS=str(rows), RFM_PERF='0')
+        with tempfile.TemporaryDirectory() as workdir:
+            proc = subprocess.Popen(
+                [sys.executable, '-m', 'streamlit', 'run', script, '--server.headless', 'true', '--server.port', str(SERVER_PORT)],
+                cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_ready(f'http://localhost:{SERVER_PORT}{ready}', proc, timeout)
+                latency, received = asyncio.run(first_paint(SERVER_PORT))
+            finally:
+                proc.terminate()
+                proc.wait()
+        results[name] = {'latency_ms': latency * 1000, 'payload_kb': received / 1024, 'peak_mb': 0.0, 'sketch_ms': 0.0, 'match_ms': 0.0}
+    return results
+
+def metric_limit(metric, base):
+    if metric.endswith('_ms'):
+        return base * (1 + LATENCY_TOLERANCE) + LATENCY_SLACK_MS
+    if metric.endswith('_mb'):
+        return max(base, 0) * (1 + MEMORY_TOLERANCE) + MEMORY_SLACK_MB
+    if metric.endswith('_kb'):
+        return base * (1 + PAYLOAD_TOLERANCE)
+    return base
+
+def is_reference(name):
+    # legacy implementations are recorded for comparison only and never gate a run
+    return 'legacy' in name
+
+def regressions(results, baseline):
+    failures = []
+    for size, interactions in results.items():
+        for name, metrics in interactions.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None or is_reference(name):
+                continue
+            for metric, value in metrics.items():
+                if metric not in base or is_reference(metric):
+                    continue
+                limit = metric_limit(metric, base[metric])
+                if value > limit:
+                    failures.append(f"{size} / {name}: {metric} {value:.1f} > {limit:.1f} (baseline {base[metric]:.1f})")
+    return failures
+
+def load_app():
+    if 'app' not in sys.modules:
+        os.environ['RFM_SAMPLE_ROWS'] = '1000'
+        spec = importlib.util.spec_from_file_location('app', APP)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['app'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['app']
+
+def clustered_frame(rows, clusters, seed=42):
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform([1, 1, 50], [300, 20, 3000], (clusters, 3))
+    ids = rng.integers(0, clusters, rows).astype(np.int16)
+    return pd.DataFrame({
+        'Cluster_KMeans': ids,
+        'Recency': rng.gamma(4, centres[ids, 0] / 4),
+        'Frequency': rng.gamma(4, centres[ids, 1] / 4),
+        'Monetary': rng.gamma(4, centres[ids, 2] / 4),
+    })
+
+def legacy_cluster_pass(df, cid):
+    cd = df[df['Cluster_KMeans'] == cid]
+    cd['Recency'].mean(), cd['Frequency'].mean(), cd['Monetary'].mean()
+    df.loc[df['Cluster_KMeans'] == cid, 'Cluster_Label'] = f"C{cid}"
+    df.loc[df['Cluster_KMeans'] == cid, 'Priority'] = 'MEDIUM'
+
+def bench_profiling(args):
+    app = load_app()
+    df = clustered_frame(args.profiling_rows, args.profiling_clusters)
+    started = time.perf_counter()
+    app.init_data(df, f'bench-profiling-{args.profiling_rows}-{args.profiling_clusters}')
+    vectorized = time.perf_counter() - started
+    
+    legacy = df.copy()
+    started = time.perf_counter()
+    for cid in legacy['Cluster_KMeans'].unique()[:LEGACY_CLUSTERS]:
+        legacy_cluster_pass(legacy, cid)
+    per_cluster = (time.perf_counter() - started) / LEGACY_CLUSTERS
+    del legacy
+    
+    label = f"init_data_{args.profiling_clusters}c_{args.profiling_rows}r"
+    return {
+        label: {'latency_ms': vectorized * 1000},
+        f"{label}_legacy_est": {'latency_ms': per_cluster * args.profiling_clusters * 1000},
+    }
+
+def bench_snapshot(args):
+    app = load_app()
+    path = os.path.abspath(f'snapshot-{args.snapshot_rows}.csv')
+    write_segments(path, args.snapshot_rows)
+    results = {}
+    for name in ['csv_cold', 'snapshot_warm']:
+        started = time.perf_counter()
+        rfm, _, _ = app.load_segments(path)
+        results[f"load_segments_{name}_{args.snapshot_rows}r"] = {'latency_ms': (time.perf_counter() - started) * 1000}
+        del rfm
+    return results
+
+def legacy_filter(rfm, ranges, segment, priority):
+    filtered_df = rfm.copy()
+    if segment != 'all':
+        filtered_df = filtered_df[filtered_df['Cluster_KMeans'] == segment]
+    if priority != 'all':
+        filtered_df = filtered_df[filtered_df['Priority'] == priority]
+    for col, (lo, hi) in ranges.items():
+        filtered_df = filtered_df[(filtered_df[col] >= lo) & (filtered_df[col] <= hi)]
+    return filtered_df
+
+def indexed_filter(rfm, fidx, ranges, segment, priority):
+    rows = load_app().select_rows(fidx, ranges, segment, priority)
+    return rfm if rows is None else rfm.take(rows)
+
+def best_of(fn, *args):
+    timings = []
+    for _ in range(FILTER_REPEATS):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def bench_filters(args):
+    app = load_app()
+    raw, version = app.sample_segments(args.filter_rows)
+    _, _, rfm = app.init_data(raw, version)
+    fidx = app.build_filter_index(rfm, version)
+    
+    bounds = {col: tuple(np.quantile(rfm[col], [0.25, 0.75])) for col in app.RANGE_FILTER_COLS}
+    choices = {'rfm': 'RFM_Score', 'monetary': 'Monetary', 'frequency': 'Frequency', 'recency': 'Recency', 'segment': None, 'priority': None}
+    segment = rfm['Cluster_KMeans'].value_counts().index[0]
+    priority = rfm['Priority'].value_counts().index[0]
+    
+    results = {}
+    for n in range(len(choices) + 1):
+        for combo in itertools.combinations(choices, n):
+            call = (
+                {choices[name]: bounds[choices[name]] for name in combo if choices[name]},
+                segment if 'segment' in combo else 'all',
+                priority if 'priority' in combo else 'all',
+            )
+            assert len(indexed_filter(rfm, fidx, *call)) == len(legacy_filter(rfm, *call))
+            results[f"filter_{'+'.join(combo) or 'none'}"] = {
+                'select_ms': best_of(app.select_rows, fidx, *call),
+                'latency_ms': best_of(indexed_filter, rfm, fidx, *call),
+                'legacy_ms': best_of(legacy_filter, rfm, *call),
+            }
+    return results
+
+def rss_mb():
+    gc.collect()
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def bench_sessions(args):
+    os.environ['RFM_SAMPLE_ROWS'] = str(args.session_rows)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    
+    sessions, results = [], {}
+    for count in SESSION_COUNTS:
+        while len(sessions) < count:
+            at = AppTest.from_file(APP, default_timeout=args.timeout)
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            sessions.append(at)
+        results[f"sessions_{count}_{args.session_rows}r"] = {'rss_mb': rss_mb()}
+    first, last = results[f"sessions_{SESSION_COUNTS[0]}_{args.session_rows}r"], results[f"sessions_{SESSION_COUNTS[-1]}_{args.session_rows}r"]
+    results[f"sessions_marginal_{args.session_rows}r"] = {'marginal_mb': (last['rss_mb'] - first['rss_mb']) / (SESSION_COUNTS[-1] - SESSION_COUNTS[0])}
+    return results
+
+PASS_METHODS = [
+    (pd.DataFrame, 'groupby'), (pd.Series, 'groupby'), (pd.DataFrame, 'describe'), (pd.DataFrame, 'nlargest'),
+    (pd.Series, 'value_counts'), (pd.Series, 'sum'), (pd.Series, 'mean'), (StringMethods, 'contains'),
+]
+
+class PassCounter:
+    def __init__(self, min_rows):
+        self.min_rows, self.count, self.local = min_rows, 0, threading.local()
+    
+    def wrap(self, method):
+        def counted(obj, *args, **kwargs):
+            depth = getattr(self.local, 'depth', 0)
+            if depth == 0 and len(obj._data if isinstance(obj, StringMethods) else obj) >= self.min_rows:
+                self.count += 1
+            self.local.depth = depth + 1
+            try:
+                return method(obj, *args, **kwargs)
+            finally:
+                self.local.depth = depth
+        return counted
+    
+    def __enter__(self):
+        self.originals = [(cls, name, getattr(cls, name)) for cls, name in PASS_METHODS]
+        for cls, name, method in self.originals:
+            setattr(cls, name, self.wrap(method))
+        return self
+    
+    def __exit__(self, *exc):
+        for cls, name, method in self.originals:
+            setattr(cls, name, method)
+
+def legacy_insights(df):
+    df['Cluster_Label'].value_counts()
+    df.groupby('Cluster_Label')['Monetary'].sum()
+    df.groupby('Cluster_Label').size()
+    df.groupby('Cluster_Label').agg({c: 'mean' for c in ['Recency', 'Frequency', 'Monetary', 'AvgOrderValue', 'RFM_Score']})
+    df.describe()
+    df.groupby('Cluster_Label')['Monetary'].sum()
+    df['Cluster_Label'].value_counts()
+    df.groupby('Cluster_Label')['AvgOrderValue'].mean()
+    df.groupby('Cluster_Label')['Frequency'].mean()
+    len(df[df['Cluster_Label'].str.contains('Champions')])
+    df['Recency'].mean()
+    df.nlargest(max(1, int(len(df) * 0.2)), 'Monetary')['Monetary'].sum()
+    df['Monetary'].sum()
+    df['Recency'].mean()
+    df['Frequency'].mean()
+
+def bench_passes(args):
+    os.environ['RFM_SAMPLE_ROWS'] = str(args.pass_rows)
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    at.run()
+    next(drag(at, 'monetary_filter', [0.9]))
+    at.run()
+    app = load_app()
+    raw, version = app.sample_segments(args.pass_rows)
+    _, _, rfm = app.init_data(raw, version)
+    ranges = at.session_state['applied_filters']['ranges'] | {'Monetary': at.select_slider(key='monetary_filter').value}
+    filtered = legacy_filter(rfm, {col: ranges[col] for col in app.RANGE_FILTER_COLS}, 'all', 'all')
+    
+    results = {}
+    for name, run in [('passes_per_rerun', lambda: at.button(key='apply_filters').click().run()), ('passes_per_rerun_legacy', lambda: legacy_insights(filtered))]:
+        with PassCounter(len(filtered)) as counter:
+            run()
+        results[f"{name}_{args.pass_rows}r"] = {'passes': counter.count}
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return results
+
+def bench_stream(args):
+    path = os.path.abspath(f'stream-{args.stream_rows}.csv')
+    write_segments(path, args.stream_rows)
+    env = dict(os.environ, RFM_SAMPLE_ROWS='1000', RFM_STREAM_THRESHOLD_MB='0', RFM_PERF='0')
+    out = subprocess.run([sys.executable, '-c', STREAM_PROBE, APP, path], env=env, capture_output=True, text=True, check=True).stdout
+    probe = json.loads(out.strip().splitlines()[-1])
+    if probe['rows'] != args.stream_rows:
+        raise RuntimeError(f"streamed {probe['rows']} of {args.stream_rows} rows")
+    file_mb = os.path.getsize(path) / 2**20
+    os.remove(path)
+    return {f"load_stream_{args.stream_rows}r": {'latency_ms': probe['latency_ms'], 'peak_mb': probe['peak_mb'], 'file_mb': file_mb}}
+
+COMPONENTS = {
+    'profiling': bench_profiling,
+    'snapshot': bench_snapshot,
+    'filters': bench_filters,
+    'sessions': bench_sessions,
+    'passes': bench_passes,
+    'stream': bench_stream,
+}
+
+def print_results(title, results):
+    print(f"\n{title}")
+    for name, metrics in results.items():
+        print(f"  {name:<56}" + "  ".join(f"{metric} {value:,.1f}" for metric, value in metrics.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive app.py headlessly across synthetic dataset sizes.")
+    parser.add_argument('--sizes', type=int, nargs='*', default=SIZES)
+    parser.add_argument('--components', nargs='*', choices=list(COMPONENTS), default=list(COMPONENTS))
+    parser.add_argument('--profiling-rows', type=int, default=PROFILING_ROWS)
+    parser.add_argument('--profiling-clusters', type=int, default=PROFILING_CLUSTERS)
+    parser.add_argument('--snapshot-rows', type=int, default=SNAPSHOT_ROWS)
+    parser.add_argument('--filter-rows', type=int, default=FILTER_ROWS)
+    parser.add_argument('--session-rows', type=int, default=SESSION_ROWS)
+    parser.add_argument('--pass-rows', type=int, default=PASS_ROWS)
+    parser.add_argument('--stream-rows', type=int, default=STREAM_ROWS)
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for rows in args.sizes:
+                results[str(rows)] = bench_size(rows, args.timeout)
+                if websockets is None:
+                    print("websockets is not installed; skipping first-paint runs")
+                else:
+                    results[str(rows)].update(bench_first_paint(rows, args.timeout))
+                print(f"\n{rows:,} rows")
+                print(f"  {'interaction':<16}{'latency ms':>12}{'payload KB':>12}{'peak MB':>10}{'sketch ms':>11}{'match ms':>10}")
+                for name, m in results[str(rows)].items():
+                    print(f"  {name:<16}{m['latency_ms']:>12.1f}{m['payload_kb']:>12.1f}{m['peak_mb']:>10.1f}{m['sketch_ms']:>11.2f}{m['match_ms']:>10.3f}")
+            if args.components:
+                results['components'] = {}
+                logging.disable(logging.WARNING)
+                try:
+                    for name in args.components:
+                        results['components'].update(COMPONENTS[name](args))
+                finally:
+                    logging.disable(logging.NOTSET)
+                print_results("components", results['components'])
+        finally:
+            os.chdir(cwd)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        for key, entries in results.items():
+            baseline.setdefault(key, {}).update(entries)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    failures = regressions(results, baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if not baseline:
+        print("\nNo baseline found; run with --update-baseline to record one.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
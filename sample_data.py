@@ -0,0 +1,157 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+CHUNK_ROWS = 1000000
+FIRST_CUSTOMER_ID = 12346
+MAX_RECENCY = 374
+
+# Per-cluster shape fitted on final_customer_segments.csv: share of customers and
+# lognormal (mu, sigma) for Recency, Frequency and AvgOrderValue.
+KMEANS_PROFILES = {
+    0: (300, (3.85, 0.99), (0.87, 0.76), (6.72, 0.32)),
+    1: (268, (1.81, 0.95), (2.62, 0.50), (5.79, 0.46)),
+    2: (2174, (3.42, 0.95), (0.98, 0.72), (5.47, 0.51)),
+    3: (18, (1.51, 1.13), (3.51, 0.59), (7.04, 0.64)),
+    4: (77, (0.00, 0.05), (2.04, 0.87), (5.73, 0.47)),
+    5: (839, (5.46, 0.27), (0.33, 0.49), (5.33, 0.60)),
+    6: (4, (0.17, 0.35), (4.78, 0.38), (5.49, 0.74)),
+}
+RECENCY_FREQUENCY_CORR = -0.3
+
+DBSCAN_LABELS = [-1, 0, 1, 2, 3]
+DBSCAN_GIVEN_KMEANS = [
+    [0.100, 0.000, 0.860, 0.000, 0.040],
+    [0.164, 0.149, 0.687, 0.000, 0.000],
+    [0.000, 0.007, 0.993, 0.000, 0.000],
+    [1.000, 0.000, 0.000, 0.000, 0.000],
+    [0.273, 0.000, 0.000, 0.727, 0.000],
+    [0.001, 0.000, 0.999, 0.000, 0.000],
+    [1.000, 0.000, 0.000, 0.000, 0.000],
+]
+AGGLOMERATIVE_GIVEN_KMEANS = [
+    [0.520, 0.000, 0.073, 0.000, 0.000, 0.407],
+    [0.851, 0.019, 0.000, 0.090, 0.000, 0.040],
+    [0.993, 0.000, 0.007, 0.000, 0.000, 0.000],
+    [0.000, 0.889, 0.000, 0.111, 0.000, 0.000],
+    [0.000, 0.000, 0.000, 1.000, 0.000, 0.000],
+    [0.017, 0.000, 0.983, 0.000, 0.000, 0.000],
+    [0.000, 0.750, 0.000, 0.000, 0.250, 0.000],
+]
+
+# Quintile edges of the real file, fixed so that chunks score independently.
+R_SCORE_EDGES = [12, 31, 66, 170]
+F_SCORE_EDGES = [1, 2, 3, 6]
+M_SCORE_EDGES = [252.45, 475.3, 894.8, 1908]
+
+def draw_conditional(rng, given, table, labels):
+    cum = np.cumsum(table, axis=1)[given]
+    cum[:, -1] = 1.0
+    return np.asarray(labels)[(rng.random(len(given))[:, None] > cum).sum(axis=1)]
+
+CATEGORIES = ['Champions', 'Loyal Customers', 'At Risk', 'Lost', 'Potential Loyalists', 'Big Spenders', 'Others']
+
+def customer_categories(r, f, m):
+    conditions = [
+        (r >= 4) & (f >= 4) & (m >= 4),
+        (r >= 3) & (f >= 3),
+        (r <= 2) & (f >= 3),
+        (r <= 2),
+        (r >= 4),
+        (m >= 3),
+    ]
+    codes = np.select(conditions, np.arange(len(conditions), dtype=np.int8), len(conditions))
+    return pd.Categorical.from_codes(codes, CATEGORIES)
+
+def generate_segments(n_rows, seed=42, start=0):
+    rng = np.random.default_rng([seed, start])
+    clusters = list(KMEANS_PROFILES)
+    weights = np.array([KMEANS_PROFILES[c][0] for c in clusters], dtype=float)
+    kmeans = rng.choice(clusters, n_rows, p=weights / weights.sum())
+
+    params = np.array([[p for shape in KMEANS_PROFILES[c][1:] for p in shape] for c in clusters])[kmeans]
+    z = rng.standard_normal((3, n_rows))
+    z[0] = RECENCY_FREQUENCY_CORR * z[1] + np.sqrt(1 - RECENCY_FREQUENCY_CORR ** 2) * z[0]
+
+    recency = np.clip(np.rint(np.exp(params[:, 0] + params[:, 1] * z[0])), 1, MAX_RECENCY).astype(np.int64)
+    frequency = np.maximum(np.rint(np.exp(params[:, 2] + params[:, 3] * z[1])), 1).astype(np.int64)
+    avg_order = np.round(np.exp(params[:, 4] + params[:, 5] * z[2]), 2)
+    monetary = frequency * avg_order
+
+    r_score = (5 - np.searchsorted(R_SCORE_EDGES, recency, side='left')).astype(np.int64)
+    f_score = (1 + np.searchsorted(F_SCORE_EDGES, frequency, side='left')).astype(np.int64)
+    m_score = (1 + np.searchsorted(M_SCORE_EDGES, monetary, side='left')).astype(np.int64)
+
+    df = pd.DataFrame({
+        'Recency': recency,
+        'Frequency': frequency,
+        'Monetary': monetary,
+        'AvgOrderValue': monetary / frequency,
+        'TransaksiPerHari': frequency / recency,
+        'TransactionRate': 1 / recency,
+        'R_Score': r_score,
+        'F_Score': f_score,
+        'M_Score': m_score,
+        'RFM_Score': r_score + f_score + m_score,
+        'RFM_Segment': r_score * 100 + f_score * 10 + m_score,
+        'Customer_Category': customer_categories(r_score, f_score, m_score),
+        'Cluster_KMeans': kmeans,
+        'Cluster_DBSCAN': draw_conditional(rng, kmeans, DBSCAN_GIVEN_KMEANS, DBSCAN_LABELS),
+        'Cluster_Agglomerative': draw_conditional(rng, kmeans, AGGLOMERATIVE_GIVEN_KMEANS, range(6)),
+    }, index=pd.Index(np.arange(FIRST_CUSTOMER_ID + start, FIRST_CUSTOMER_ID + start + n_rows, dtype=float), name='Customer ID'))
+    return df
+
+def iter_segments(n_rows, chunk_rows=CHUNK_ROWS, seed=42):
+    for start in range(0, n_rows, chunk_rows):
+        yield generate_segments(min(chunk_rows, n_rows - start), seed, start)
+
+def write_segments(path, n_rows, chunk_rows=CHUNK_ROWS, seed=42):
+    parquet = path.endswith('.parquet')
+    if parquet and pa is None:
+        raise ImportError("Writing Parquet requires pyarrow")
+
+    tmp = f"{path}.tmp"
+    if pa is None:
+        for i, chunk in enumerate(iter_segments(n_rows, chunk_rows, seed)):
+            chunk.to_csv(tmp, mode='a' if i else 'w', header=not i)
+    else:
+        writer = None
+        try:
+            for chunk in iter_segments(n_rows, chunk_rows, seed):
+                table = pa.Table.from_pandas(chunk.reset_index(), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema) if parquet else pa_csv.CSVWriter(tmp, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    os.replace(tmp, path)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic customer segments with the real file's schema.")
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path', help="output file; .parquet writes Parquet, anything else CSV")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    write_segments(args.path, args.rows, args.chunk_rows, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {args.rows:,} rows to {args.path} in {elapsed:.1f}s ({args.rows / elapsed / 1e6:.2f}M rows/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
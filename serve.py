@@ -0,0 +1,64 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import streamlit as st
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from streamlit import runtime
+from streamlit.proto.BackMsg_pb2 import BackMsg
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+WARMUP_TIMEOUT = float(os.environ.get('RFM_WARMUP_TIMEOUT', '600'))
+
+if not hasattr(st, 'App'):
+    raise ImportError("serve.py needs Streamlit 1.57 or newer (st.App); use `streamlit run app.py` instead")
+
+warmup = {'ready': False, 'started': None, 'finished': None, 'error': None}
+
+class WarmupClient:
+    def __init__(self):
+        self.finished = threading.Event()
+
+    def write_forward_msg(self, msg):
+        if msg.WhichOneof('type') == 'script_finished':
+            self.finished.set()
+
+    @property
+    def client_context(self):
+        return None
+
+async def warm_up():
+    warmup['started'] = time.time()
+    rt = runtime.get_instance()
+    client = WarmupClient()
+    session_id = None
+    try:
+        session_id = rt.connect_session(client, user_info={})
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        rt.handle_backmsg(session_id, msg)
+        if not await asyncio.to_thread(client.finished.wait, WARMUP_TIMEOUT):
+            raise TimeoutError(f"first run did not finish within {WARMUP_TIMEOUT:.0f}s")
+        warmup['error'] = None
+        warmup['ready'] = True
+    except Exception as e:
+        warmup['error'] = str(e)
+    finally:
+        warmup['finished'] = time.time()
+        if session_id is not None:
+            rt.disconnect_session(session_id)
+
+@asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
+
+async def health(request):
+    return JSONResponse(warmup, status_code=200 if warmup['ready'] else 503)
+
+app = st.App(APP, lifespan=lifespan, routes=[Route('/health', health)])
@@ -0,0 +1,42 @@
+import importlib.util
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, 'app.py')
+DATA = os.path.join(ROOT, 'final_customer_segments (1).csv')
+
+sys.path.insert(0, ROOT)
+os.environ['RFM_WATCH_INTERVAL'] = '0'
+
+import streamlit as st
+from streamlit import logger
+
+logger.set_log_level('error')
+
+@pytest.fixture
+def segments_csv(tmp_path, monkeypatch):
+    path = tmp_path / 'segments.csv'
+    shutil.copy(DATA, path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('RFM_DATA_PATH', str(path))
+    st.cache_resource.clear()
+    yield path
+    st.cache_resource.clear()
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    os.environ['RFM_SAMPLE_ROWS'] = '5000'
+    try:
+        spec = importlib.util.spec_from_file_location('app', APP)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        del os.environ['RFM_SAMPLE_ROWS']
+        os.chdir(cwd)
+    return module
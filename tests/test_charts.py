@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+@pytest.mark.parametrize('n_clusters, budget', [(7, 10000), (200, 10000), (1000, 10000), (1000, 200000)])
+def test_stratified_sample_stays_within_budget(app, n_clusters, budget):
+    rng = np.random.default_rng(0)
+    sizes = rng.zipf(1.5, n_clusters).clip(1, 20000)
+    df = pd.DataFrame({'Cluster_KMeans': np.repeat(np.arange(n_clusters), sizes)})
+    df = df.sample(frac=1, random_state=0)
+    if len(df) <= budget:
+        df = pd.concat([df] * (budget // len(df) + 2))
+    
+    sample = app.stratified_sample(df, budget)
+    
+    assert len(sample) <= budget
+    shown = sample['Cluster_KMeans'].value_counts()
+    assert len(shown) == min(n_clusters, budget)
+    floor = min(app.MIN_POINTS_PER_CLUSTER, budget // n_clusters)
+    counts = df['Cluster_KMeans'].value_counts()
+    assert (shown.reindex(counts.index) >= np.minimum(counts, floor)).all()
+
+def test_scatter_names_each_cluster_in_its_hover(app):
+    ranges = {col: list(domain) for col, domain in app.domains.items()}
+    rows, view_key, filtered_df, agg, hists = app.filter_view('all', 'all', ranges)
+    fig3 = app.create_charts(filtered_df, agg, 1000, hists)[2]
+    
+    labels = filtered_df.groupby('Cluster_KMeans')['Cluster_Label'].first()
+    assert [trace.name for trace in fig3.data] == list(labels)
+    assert sum(len(trace.x) for trace in fig3.data) <= 1000
+    assert all('%{fullData.name}' in trace.hovertemplate for trace in fig3.data)
+
+def test_scatter_is_one_trace_for_many_clusters(app, monkeypatch):
+    monkeypatch.setattr(app, 'SCATTER_MAX_TRACES', 1)
+    ranges = {col: list(domain) for col, domain in app.domains.items()}
+    rows, view_key, filtered_df, agg, hists = app.filter_view('all', 'all', ranges)
+    fig3 = app.create_charts(filtered_df, agg, 1000, hists)[2]
+    
+    assert len(fig3.data) == 1
+    trace = fig3.data[0]
+    assert len(trace.x) <= 1000
+    assert set(np.asarray(trace.customdata)) == set(filtered_df['Cluster_KMeans'])
+    assert np.array_equal(np.asarray(trace.customdata), np.asarray(trace.marker.color))
+
+@pytest.mark.parametrize('segment, monetary', [('all', None), (0, (100.0, 2000.0))])
+def test_data_summary_matches_describe(app, segment, monetary):
+    ranges = {col: list(domain) for col, domain in app.domains.items()}
+    if monetary:
+        ranges['Monetary'] = monetary
+    rows, view_key, filtered_df, agg, hists = app.filter_view(segment, 'all', ranges)
+    summary = app.agg_summary(agg)
+    expected = filtered_df[summary.columns].describe().loc[summary.index]
+    
+    np.testing.assert_allclose(summary.to_numpy(float), expected.to_numpy(float), rtol=1e-9)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from conftest import APP
+
+def apply_monetary(at, lo, hi):
+    at.select_slider(key='monetary_filter').set_range(lo, hi)
+    at.run()
+    at.button(key='apply_filters').click()
+    at.run()
+
+def test_applied_filters_follow_data_version(segments_csv):
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    apply_monetary(at, 19.24, 650.0)
+    assert at.session_state['applied_filters']['ranges']['Monetary'] == (19.24, 650.0)
+    assert not any('press Apply Filters' in m.value for m in at.markdown)
+    
+    segments = pd.read_csv(segments_csv, index_col=0)
+    extra = segments.iloc[:30].copy()
+    extra.index = extra.index + 10**6
+    extra['Monetary'] = 500000.0
+    pd.concat([segments, extra]).to_csv(segments_csv)
+    next(b for b in at.button if 'Refresh' in b.label).click()
+    at.run()
+    
+    assert not at.exception
+    applied = at.session_state['applied_filters']
+    assert applied['ranges']['Monetary'] == (19.24, 500000.0)
+    assert at.select_slider(key='monetary_filter').value == (19.24, 500000.0)
+    assert at.session_state['staged_filters'] == applied
+
+def brute_force_count(frame, ranges, segment, priority):
+    mask = np.ones(len(frame), dtype=bool)
+    for col, (lo, hi) in ranges.items():
+        mask &= frame[col].between(lo, hi).to_numpy()
+    if segment != 'all':
+        mask &= (frame['Cluster_KMeans'] == segment).to_numpy()
+    if priority != 'all':
+        mask &= (frame['Priority'] == priority).to_numpy()
+    return int(mask.sum())
+
+def test_count_rows_is_exact_for_combined_filters(app):
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        ranges = {}
+        for col in rng.choice(app.RANGE_FILTER_COLS, rng.integers(1, 5), replace=False):
+            lo, hi = np.sort(rng.choice(app.fidx['sorted'][col], 2))
+            ranges[col] = (lo, hi)
+        segment = rng.choice(['all', *app.fidx['clusters']])
+        segment = segment if segment == 'all' else int(segment)
+        priority = rng.choice(['all', *app.fidx['priorities']])
+        expected = brute_force_count(app.rfm, ranges, segment, priority)
+        assert app.count_rows(app.fidx, ranges, segment, priority) == expected
+        rows = app.select_rows(app.fidx, ranges, segment, priority)
+        if rows is not None:
+            assert len(rows) == expected and np.all(np.diff(rows) > 0)
+
+def test_cube_answers_every_monetary_stop(app):
+    stops = app.slider_steps(app.fidx['sketch']['Monetary'])
+    for lo, hi in zip(stops[:len(stops) // 2], stops[::-1]):
+        ranges = {'Monetary': (lo, hi)}
+        agg = app.cube_aggregates(app.cube, 'all', 'all', ranges)
+        assert agg is not None
+        rows = app.select_rows(app.fidx, ranges)
+        expected = app.cluster_aggregates(app.rfm if rows is None else app.rfm.take(rows))
+        assert agg['count'].sum() == expected['count'].sum()
+        assert np.isclose(agg['Monetary_sum'].sum(), expected['Monetary_sum'].sum())
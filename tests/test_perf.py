@@ -0,0 +1,20 @@
+import json
+
+from streamlit.testing.v1 import AppTest
+
+from conftest import APP
+
+def test_perf_log_exports_timings_without_tracing(monkeypatch, tmp_path):
+    log = tmp_path / 'perf.jsonl'
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('RFM_SAMPLE_ROWS', '2000')
+    monkeypatch.setenv('RFM_PERF_LOG', str(log))
+    monkeypatch.delenv('RFM_PERF', raising=False)
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    assert not at.exception
+
+    run = json.loads(log.read_text().splitlines()[-1])
+    assert run['stages']['dataset'] >= 0 and run['total'] > 0
+    assert run['peak_mb'] is None
+    assert run['charts'] == {}
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+def legacy_get_strat(strats, cid, data):
+    cd = data[data['Cluster_KMeans'] == cid]
+    if len(cd) == 0:
+        return {**strats['standard'], 'cluster_id': cid}
+    
+    r = cd['Recency'].mean() if 'Recency' in cd.columns else 100
+    f = cd['Frequency'].mean() if 'Frequency' in cd.columns else 5
+    m = cd['Monetary'].mean() if 'Monetary' in cd.columns else 500
+    
+    if pd.isna(r) or pd.isna(f) or pd.isna(m):
+        s = 'standard'
+    elif r < 50 and f > 10 and m > 1000: 
+        s = 'champions'
+    elif r < 50 and f > 5: 
+        s = 'loyal'
+    elif m > 1500: 
+        s = 'big'
+    elif r > 100: 
+        s = 'dormant'
+    elif r < 50 and f < 5: 
+        s = 'potential'
+    else: 
+        s = 'standard'
+    return {**strats[s], 'cluster_id': cid}
+
+def legacy_init_data(strats, rfm):
+    profs = {}
+    for c in rfm['Cluster_KMeans'].unique():
+        p = legacy_get_strat(strats, c, rfm)
+        profs[c] = p
+        rfm.loc[rfm['Cluster_KMeans'] == c, 'Cluster_Label'] = f"{p['name']} (C{c})"
+        rfm.loc[rfm['Cluster_KMeans'] == c, 'Priority'] = p['priority']
+    return profs, rfm
+
+def clustered_segments(n_clusters, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform([1, 1, 50], [300, 20, 3000], (n_clusters, 3))
+    ids = rng.integers(0, n_clusters, n_rows)
+    values = rng.normal(centres[ids], centres[ids] * 0.3)
+    df = pd.DataFrame({'Cluster_KMeans': ids.astype('int16'), 'Recency': values[:, 0], 'Frequency': values[:, 1], 'Monetary': values[:, 2]})
+    df.loc[df.sample(frac=0.001, random_state=seed).index, 'Monetary'] = np.nan
+    return df
+
+def test_init_data_matches_per_cluster_loop(app):
+    df = clustered_segments(1000, 50000)
+    nan_cluster = df['Cluster_KMeans'].iat[0]
+    df.loc[df['Cluster_KMeans'] == nan_cluster, 'Recency'] = np.nan
+    
+    profs, colors, rfm = app.init_data(df, 'test-1k-clusters')
+    legacy_profs, legacy = legacy_init_data(app.strats, df.copy())
+    
+    assert profs == {int(c): p for c, p in legacy_profs.items()}
+    assert {p['name'] for p in profs.values()} == {s['name'] for s in app.strats.values()}
+    assert (rfm['Cluster_Label'].astype(str) == legacy['Cluster_Label']).all()
+    assert (rfm['Priority'].astype(str) == legacy['Priority']).all()
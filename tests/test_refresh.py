@@ -0,0 +1,28 @@
+import gc
+import weakref
+
+import pandas as pd
+import streamlit as st
+
+from conftest import DATA
+
+def test_retired_datasets_are_released(app, tmp_path, monkeypatch):
+    path = tmp_path / 'segments.csv'
+    segments = pd.read_csv(DATA, index_col=0)
+    segments.to_csv(path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app, 'SAMPLE_ROWS', 0)
+    monkeypatch.setattr(app, 'DATA_FILES', [str(path)])
+    st.cache_resource.clear()
+
+    refs = [weakref.ref(app.current_dataset()['fidx']['order']['Monetary'])]
+    for i in range(4):
+        segments.iloc[i, segments.columns.get_loc('Monetary')] += 1000
+        segments.to_csv(path)
+        assert app.refresh_dataset()['changed'] == 1
+        refs.append(weakref.ref(app.current_dataset()['fidx']['order']['Monetary']))
+    gc.collect()
+    alive = [ref() is not None for ref in refs]
+    st.cache_resource.clear()
+
+    assert alive == [False, False, False, True, True]
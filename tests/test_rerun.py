@@ -0,0 +1,29 @@
+import pandas.util
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from conftest import APP
+
+def warm_rerun(monkeypatch, rows):
+    monkeypatch.setenv('RFM_SAMPLE_ROWS', str(rows))
+    st.cache_resource.clear()
+    at = AppTest.from_file(APP, default_timeout=300)
+    at.run()
+    assert not at.exception
+
+    hashed = []
+    original = pandas.util.hash_pandas_object
+    monkeypatch.setattr(pandas.util, 'hash_pandas_object', lambda obj, *a, **kw: hashed.append(len(obj)) or original(obj, *a, **kw))
+    at.run()
+    monkeypatch.setattr(pandas.util, 'hash_pandas_object', original)
+    assert not at.exception
+    return hashed, at.session_state['perf_history'][-1]['stages']['dataset']
+
+def test_rerun_cost_does_not_scale_with_rows(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    small_hashed, small = warm_rerun(monkeypatch, 2000)
+    large_hashed, large = warm_rerun(monkeypatch, 400000)
+    st.cache_resource.clear()
+
+    assert small_hashed == [] and large_hashed == []
+    assert large < max(10 * small, 0.05)
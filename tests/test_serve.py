@@ -0,0 +1,47 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from conftest import ROOT
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def health(port):
+    try:
+        with urllib.request.urlopen(f'http://localhost:{port}/health', timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+    except OSError:
+        return None, None
+
+def test_health_reports_ready_after_warm_up(segments_csv):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', os.path.join(ROOT, 'serve.py'), '--server.headless', 'true', '--server.port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        seen = set()
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            status, state = health(port)
+            seen.add(status)
+            if status == 200:
+                break
+            time.sleep(0.1)
+        assert status == 200, state
+        assert state['ready'] and state['error'] is None
+        assert state['finished'] >= state['started']
+        assert seen <= {None, 503, 200}
+    finally:
+        proc.terminate()
+        proc.wait()
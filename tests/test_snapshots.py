@@ -0,0 +1,30 @@
+import os
+import shutil
+
+import streamlit as st
+
+from conftest import DATA
+
+def load_with_cube(app, path):
+    raw, version, _ = app.load_segments(str(path))
+    profs, _, rfm = app.init_data(raw, version)
+    app.load_cube(rfm, app.build_filter_index(rfm, version), profs, str(path), version)
+    return app.snapshot_path(str(path), version)
+
+def test_cube_is_persisted_next_to_its_csv(app, tmp_path, monkeypatch):
+    data, cwd = tmp_path / 'data', tmp_path / 'cwd'
+    data.mkdir()
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    shutil.copy(DATA, data / 'segments.csv')
+    shutil.copy(DATA, data / 'segments-eu.csv')
+    stale = data / app.SNAPSHOT_DIR / 'segments-0123456789abcdef.cube'
+    stale.mkdir(parents=True)
+    st.cache_resource.clear()
+
+    segments = load_with_cube(app, data / 'segments.csv')
+    eu = load_with_cube(app, data / 'segments-eu.csv')
+    st.cache_resource.clear()
+
+    assert os.listdir(cwd) == []
+    assert sorted(os.listdir(data / app.SNAPSHOT_DIR)) == sorted(os.path.basename(p) for p in [segments, segments + '.cube', eu, eu + '.cube'])
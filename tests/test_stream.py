@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from conftest import APP, DATA
+from sample_data import write_segments
+
+ROWS = 1000000
+
+PROBE = '''
+import importlib.util, json, logging, os, sys
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+logging.disable(logging.WARNING)
+spec = importlib.util.spec_from_file_location('app', sys.argv[1])
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+app.STREAM_CHUNK_ROWS, app.RESERVOIR_ROWS = 50000, 20000
+
+def status(key):
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(key)) / 1024
+
+with open('/proc/self/clear_refs', 'w') as f:
+    f.write('5')
+before = status('VmRSS')
+sample, version, stream = app.load_segments(sys.argv[2])
+print(json.dumps({'rows': stream['rows'], 'sample': len(sample), 'clusters': int(stream['agg']['count'].sum()), 'peak_mb': status('VmHWM') - before}))
+'''
+
+def test_streaming_load_bounds_peak_memory(tmp_path):
+    path = tmp_path / 'segments.csv'
+    write_segments(str(path), ROWS)
+    env = dict(os.environ, RFM_SAMPLE_ROWS='1000', RFM_STREAM_THRESHOLD_MB='0')
+    out = subprocess.run([sys.executable, '-c', PROBE, APP, str(path)], cwd=tmp_path, env=env, capture_output=True, text=True, check=True).stdout
+    probe = json.loads(out.strip().splitlines()[-1])
+
+    assert probe['rows'] == probe['clusters'] == ROWS
+    assert probe['sample'] == 20000
+    assert probe['peak_mb'] < os.path.getsize(path) / 2**20 * 0.75
+
+def test_corrupt_stream_cache_is_a_miss(app, tmp_path):
+    path = str(tmp_path / 'segments.csv')
+    shutil.copy(DATA, path)
+    version = app.file_fingerprint(path)
+    cache = app.snapshot_path(path, version) + '.stream.pkl'
+    os.makedirs(os.path.dirname(cache))
+    with open(cache, 'wb') as f:
+        f.write(b'not a pickle')
+
+    sample, _, stream = app.load_stream(path, version)
+    assert stream['rows'] == len(sample) == 3680
+    assert os.listdir(os.path.dirname(cache)) == [os.path.basename(cache)]
+    cached, _, _ = app.load_stream(path, version)
+    assert cached.equals(sample)